@@ -0,0 +1,99 @@
+"""
+Semantic answer cache for repeated KB questions.
+A new question is matched against previously answered ones by cosine similarity
+of their embeddings; above the threshold the stored answer and citations are
+returned without a RetrievalQA round trip. Every entry is tagged with the index
+version it was answered from, and entries from older versions are dropped.
+"""
+import json
+import time
+import sqlite3
+import threading
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    result TEXT NOT NULL,
+    index_version TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+def _normalize(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class AnswerCache:
+    """Nearest-question lookup over cached answers for the current index version."""
+
+    def __init__(self, path, threshold=0.95, max_entries=1000):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._version = None
+        self._ids, self._matrix, self._results = [], np.zeros((0, 0), dtype=np.float32), []
+
+    def _load(self, index_version):
+        """(Re)load entries for index_version into memory, purging stale ones."""
+        self._conn.execute("DELETE FROM answers WHERE index_version != ?", (index_version,))
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT id, vector, result FROM answers WHERE index_version = ? ORDER BY id", (index_version,)
+        ).fetchall()
+        self._ids = [row[0] for row in rows]
+        self._results = [json.loads(row[2]) for row in rows]
+        self._matrix = (np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+                        if rows else np.zeros((0, 0), dtype=np.float32))
+        self._version = index_version
+
+    def lookup(self, query_vector, index_version):
+        """Return (result, similarity) for the closest cached question, or None below the threshold."""
+        with self._lock:
+            if index_version != self._version:
+                self._load(index_version)
+            if not self._ids:
+                self.misses += 1
+                return None
+            scores = self._matrix @ _normalize(query_vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._results[best], float(scores[best])
+
+    def store(self, question, query_vector, result, index_version):
+        vector = _normalize(query_vector)
+        with self._lock:
+            if index_version != self._version:
+                self._load(index_version)
+            self._conn.execute(
+                "INSERT INTO answers (question, vector, result, index_version, created_at) VALUES (?, ?, ?, ?, ?)",
+                (question, vector.tobytes(), json.dumps(result), index_version, time.time()),
+            )
+            # Keep only the newest max_entries answers
+            self._conn.execute(
+                "DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers ORDER BY id DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+            self._load(index_version)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+            self._version = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._ids), "threshold": self.threshold}
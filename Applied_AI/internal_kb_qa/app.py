@@ -1,10 +1,15 @@
 import streamlit as st
 import os
-from rag_pipeline import run_rag_pipeline
+from rag_pipeline import stream_rag_pipeline, reload_pipeline
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@st.cache_data
+def list_docs(docs_dir, mtime):
+    # mtime is part of the cache key, so the listing refreshes only when ./docs changes
+    return sorted(f for f in os.listdir(docs_dir) if f.endswith('.pdf'))
+
 st.set_page_config(page_title="Internal KB Q&A", layout="wide")
 
 st.title("📚 Internal Knowledge-Base Q&A")
@@ -23,27 +28,60 @@ with st.sidebar:
     if not os.path.exists(docs_dir):
         os.makedirs(docs_dir)
     
-    docs = [f for f in os.listdir(docs_dir) if f.endswith('.pdf')]
+    docs = list_docs(docs_dir, os.path.getmtime(docs_dir))
     if docs:
         for doc in docs:
             st.text(f"📄 {doc}")
     else:
         st.info("No PDFs found in ./docs. Add some to test real retrieval.")
 
+    if st.button("🔄 Reload index"):
+        reload_pipeline()
+        st.success("Index will be reopened on the next query.")
+
 query = st.text_input("Ask a question about company policy:", placeholder="e.g., How do I request for a leave?")
 
 if st.button("Search"):
     if not query:
         st.warning("Please enter a question.")
     else:
-        with st.spinner("Searching knowledge base..."):
-            result = run_rag_pipeline(query)
-            
-            st.markdown("### 🤖 Answer")
-            st.write(result['result'])
-            
-            st.markdown("### 📍 Citations")
-            for doc in result['source_documents']:
-                source = doc['metadata'].get('source', 'Unknown')
-                page = doc['metadata'].get('page', '?')
-                st.caption(f"Source: {source} (Page {page})")
+        st.markdown("### 🤖 Answer")
+        status = st.empty()
+        answer_box = st.empty()
+        st.markdown("### 📍 Citations")
+        citations_box = st.container()
+        debug_box = st.expander("🛠️ Debug")
+
+        status.caption("Searching knowledge base...")
+        answer = ""
+        for event in stream_rag_pipeline(query):
+            if event['type'] == 'citations':
+                if event['cached']:
+                    status.caption("⚡ Served from answer cache")
+                elif event['retrieval'] == 'lexical':
+                    status.caption("⚡ Exact-term match (BM25 fast path, no embedding call)")
+                else:
+                    status.caption("Generating answer...")
+                with citations_box:
+                    for doc in event['source_documents']:
+                        source = doc['metadata'].get('source', 'Unknown')
+                        page = doc['metadata'].get('page', '?')
+                        st.caption(f"Source: {source} (Page {page})")
+            elif event['type'] == 'token':
+                answer += event['text']
+                answer_box.markdown(answer + "▌")
+            elif event['type'] == 'done':
+                answer_box.markdown(answer)
+                if not event['result'].get('cached') and event['result'].get('retrieval') != 'lexical':
+                    status.empty()
+                timings = event['timings']
+                with debug_box:
+                    col1, col2, col3, col4 = st.columns(4)
+                    col1.metric("Retrieval", f"{timings['retrieval_s'] * 1000:.0f} ms")
+                    col2.metric("Time to first token", f"{(timings['ttft_s'] or 0) * 1000:.0f} ms")
+                    col3.metric("Total", f"{timings['total_s'] * 1000:.0f} ms")
+                    if timings['cold_start_s']:
+                        col4.metric("Cold start", f"{timings['cold_start_s'] * 1000:.0f} ms", help="Pipeline load included in this query")
+                    else:
+                        col4.metric("Cold start", "warm", help="Reused the process-wide pipeline")
+                    st.caption(f"Retrieval mode: {event['result'].get('retrieval', '?')}")
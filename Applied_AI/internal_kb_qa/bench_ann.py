@@ -0,0 +1,77 @@
+"""
+ANN vs. exact search benchmark on the same synthetic embedding corpus.
+Reports build time, size on disk, per-query latency and recall@k against exact
+search for IVF (int8/float16, several nprobe) and HNSW (several ef, if hnswlib is installed).
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from vector_index import ExactIndex, HNSWIndex, IVFIndex, normalize_rows
+
+def clustered_vectors(n, dim, n_clusters=256, noise=1.5, seed=0):
+    """Embedding-like data: points scattered around random unit centres (higher noise = harder)."""
+    rng = np.random.default_rng(seed)
+    centres = normalize_rows(rng.standard_normal((n_clusters, dim)))
+    points = centres[rng.integers(n_clusters, size=n)] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim)
+    return normalize_rows(points)
+
+def dir_size_mb(path):
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+def measure(index, queries, truth, k, **knobs):
+    """truth holds the exact top-k ids per query; IVF reorders rows, so compare ids, not positions."""
+    latencies, found = [], 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        idx, _ = index.search(q[None, :], k, **knobs)
+        latencies.append(time.perf_counter() - start)
+        found += len({index.ids[i] for i in idx[0] if i >= 0} & set(expected))
+    return np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000, found / truth.size
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ANN backends against exact search.")
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--noise", type=float, default=1.5, help="Cluster spread; higher makes ANN harder")
+    args = parser.parse_args()
+
+    # Queries come from the same distribution as the corpus
+    data = clustered_vectors(args.n + args.queries, args.dim, noise=args.noise)
+    vectors, queries = data[:args.n], data[args.n:]
+    ids = [str(i) for i in range(args.n)]
+    empty = [""] * args.n
+
+    exact = ExactIndex(ids, vectors, empty, [{}] * args.n)
+    exact_idx, _ = exact.search(queries, args.k)
+    truth = np.array([[ids[i] for i in row] for row in exact_idx])
+    p50, p95, _ = measure(exact, queries, truth, args.k)
+    print(f"📊 {args.n} x {args.dim} vectors, {args.queries} queries, recall@{args.k} vs. exact\n")
+    print(f"{'backend':<22} | {'build s':>7} | {'disk MB':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'recall':>6}")
+    print("-" * 72)
+    print(f"{'exact (float32)':<22} | {0:>7.1f} | {vectors.nbytes / 1e6:>8.1f} | {p50:>7.2f} | {p95:>7.2f} | {1:>6.2%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for dtype in ("int8", "float16"):
+            start = time.perf_counter()
+            ivf = IVFIndex.build(os.path.join(tmp, f"ivf_{dtype}"), ids, vectors, empty, [{}] * args.n, dtype=dtype)
+            build_s = time.perf_counter() - start
+            size = dir_size_mb(os.path.join(tmp, f"ivf_{dtype}"))
+            for nprobe in (1, 4, 16, 64):
+                p50, p95, recall = measure(ivf, queries, truth, args.k, nprobe=nprobe)
+                print(f"{f'ivf {dtype} nprobe={nprobe}':<22} | {build_s:>7.1f} | {size:>8.1f} | {p50:>7.2f} | {p95:>7.2f} | {recall:>6.2%}")
+
+        try:
+            start = time.perf_counter()
+            hnsw = HNSWIndex.build(os.path.join(tmp, "hnsw"), ids, vectors, empty, [{}] * args.n)
+            build_s = time.perf_counter() - start
+            size = dir_size_mb(os.path.join(tmp, "hnsw"))
+            for ef in (16, 64, 256):
+                p50, p95, recall = measure(hnsw, queries, truth, args.k, ef=ef)
+                print(f"{f'hnsw ef={ef}':<22} | {build_s:>7.1f} | {size:>8.1f} | {p50:>7.2f} | {p95:>7.2f} | {recall:>6.2%}")
+        except ImportError:
+            print("hnsw: skipped (pip install hnswlib)")
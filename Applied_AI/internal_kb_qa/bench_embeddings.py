@@ -0,0 +1,57 @@
+"""
+Embedding throughput benchmark against the repo's mock OpenAI server.
+Starts llm_gateway.mock_server in a background thread (with random 429s to
+exercise retries) and reports embeddings/s for several concurrency levels.
+"""
+import os
+import time
+import random
+import argparse
+import threading
+import uvicorn
+
+from embedding_client import BatchedEmbeddings
+from synthetic_corpus import TOPICS, policy_sentence
+
+def start_mock_server(port):
+    # The mock reads its settings at import time
+    from llm_gateway import mock_server
+    server = uvicorn.Server(uvicorn.Config(mock_server.app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched embedding throughput.")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--rate-limit-prob", type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    # Raw throughput: no gateway rate limit
+    os.environ.setdefault("LLM_GATEWAY_RPS", "0")
+    os.environ["MOCK_RATE_LIMIT_RATE"] = str(args.rate_limit_prob)
+    os.environ.setdefault("MOCK_LATENCY_S", "0.05")
+    server = start_mock_server(args.port)
+
+    rng = random.Random(0)
+    texts = [" ".join(policy_sentence(rng, rng.choice(TOPICS)) for _ in range(8)) for _ in range(args.chunks)]
+    print(f"📊 Embedding {len(texts)} chunks (429 probability {args.rate_limit_prob})")
+
+    for concurrency in args.concurrency:
+        client = BatchedEmbeddings(
+            base_url=f"http://127.0.0.1:{args.port}/v1",
+            max_concurrency=concurrency,
+            max_batch_size=args.batch_size,
+            base_delay=0.05,
+        )
+        vectors = client.embed_documents(texts)
+        assert len(vectors) == len(texts)
+        print(f"  concurrency {concurrency:>3}: {client.embeddings_per_second:8.1f} embeddings/s "
+              f"({client.stats['requests']} requests, {client.stats['retries']} retries)")
+
+    server.should_exit = True
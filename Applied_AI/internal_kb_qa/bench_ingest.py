@@ -0,0 +1,46 @@
+"""
+Ingest parsing benchmark: serial PyPDFLoader loop vs. the process-pool parser.
+Reports pages/s for each; no embeddings are computed.
+"""
+import os
+import time
+import argparse
+import tempfile
+from langchain_community.document_loaders import PyPDFLoader
+
+from ingest import iter_parsed
+from synthetic_corpus import generate_corpus
+
+def bench_serial(paths):
+    start = time.time()
+    docs = []
+    for path in paths:
+        docs.extend(PyPDFLoader(path).load())
+    return len(docs), time.time() - start
+
+def bench_parallel(paths, workers):
+    start = time.time()
+    pages = 0
+    for _, _, page_count in iter_parsed(paths, workers):
+        pages += page_count
+    return pages, time.time() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark serial vs. parallel PDF parsing.")
+    parser.add_argument("--docs", type=int, default=64)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(tmp, args.docs, args.pages)
+        print(f"📊 Parsing {len(paths)} PDFs x {args.pages} pages")
+
+        pages, elapsed = bench_serial(paths)
+        baseline = pages / elapsed
+        print(f"  serial loader     : {pages} pages in {elapsed:.2f}s -> {baseline:.1f} pages/s")
+
+        for workers in sorted(set(args.workers)):
+            pages, elapsed = bench_parallel(paths, workers)
+            rate = pages / elapsed
+            print(f"  parallel ({workers:>2} proc): {pages} pages in {elapsed:.2f}s -> {rate:.1f} pages/s ({rate / baseline:.1f}x)")
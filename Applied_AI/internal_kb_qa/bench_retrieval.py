@@ -0,0 +1,93 @@
+"""
+Offline retrieval quality/latency benchmark for the KB pipeline.
+Generates a labelled synthetic corpus, ingests it once per splitter configuration
+with fake embeddings, and reports per splitter x retriever:
+ingest throughput, p50/p95 query latency, index size on disk and recall@k.
+"""
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from fakes import HashingEmbeddings, fake_llm
+from ingest import build_index
+from rag_pipeline import KBPipeline, RETRIEVER_K, HYBRID_FETCH_K, run_rag_pipeline
+from retrievers import BM25Retriever, HybridRetriever
+from synthetic_corpus import generate_labelled_corpus
+
+SPLITTERS = [(1000, 100), (500, 50), (2000, 200)]
+RETRIEVERS = ["dense", "bm25", "hybrid"]
+
+def dir_size_mb(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total / 1e6
+
+def make_retriever(name, pipeline, k):
+    if name == "dense":
+        return pipeline.dense_retriever(k)
+    if name == "bm25":
+        return BM25Retriever(index=pipeline.bm25, k=k)
+    return HybridRetriever(index=pipeline.bm25, dense=pipeline.dense_retriever(HYBRID_FETCH_K), k=k)
+
+def is_relevant(doc, question):
+    return (os.path.basename(doc.metadata.get("source", "")) == os.path.basename(question["source"])
+            and doc.metadata.get("page") == question["page"])
+
+def evaluate(retriever, questions):
+    latencies, found = [], 0
+    for q in questions:
+        start = time.perf_counter()
+        docs = retriever.invoke(q["question"])
+        latencies.append(time.perf_counter() - start)
+        found += any(is_relevant(d, q) for d in docs)
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "recall": found / len(questions),
+    }
+
+def end_to_end_latency(pipeline, questions):
+    """Full stream_rag_pipeline path (retrieval + fake LLM), answer cache disabled."""
+    latencies = []
+    for q in questions:
+        start = time.perf_counter()
+        run_rag_pipeline(q["question"], pipeline.persist_dir, use_cache=False, pipeline=pipeline)
+        latencies.append(time.perf_counter() - start)
+    return float(np.percentile(latencies, 50) * 1000), float(np.percentile(latencies, 95) * 1000)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark KB retrieval quality and latency offline.")
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--k", type=int, default=RETRIEVER_K)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs_dir = os.path.join(tmp, "docs")
+        paths, questions = generate_labelled_corpus(docs_dir, args.docs, args.pages, n_questions=args.questions)
+        total_pages = args.docs * args.pages
+        print(f"📊 {len(paths)} PDFs / {total_pages} pages, {len(questions)} labelled questions, recall@{args.k}\n")
+        print(f"{'splitter':>11} | {'retriever':>9} | {'ingest p/s':>10} | {'p50 ms':>7} | {'p95 ms':>7} "
+              f"| {'e2e p50':>7} | {'index MB':>8} | {'recall':>6}")
+        print("-" * 88)
+
+        for chunk_size, chunk_overlap in SPLITTERS:
+            persist_dir = os.path.join(tmp, f"index_{chunk_size}_{chunk_overlap}")
+            embeddings = HashingEmbeddings()
+            report = build_index(docs_dir, persist_dir, full=True, workers=args.workers,
+                                 embeddings=embeddings, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+            ingest_rate = total_pages / report["seconds"] if report["seconds"] else float("inf")
+            size_mb = dir_size_mb(persist_dir)
+
+            pipeline = KBPipeline(persist_dir, embeddings=embeddings, llm=fake_llm())
+            e2e_p50, _ = end_to_end_latency(pipeline, questions[:50])
+
+            for name in RETRIEVERS:
+                stats = evaluate(make_retriever(name, pipeline, args.k), questions)
+                print(f"{chunk_size:>5}/{chunk_overlap:<5} | {name:>9} | {ingest_rate:>10.1f} | {stats['p50_ms']:>7.2f} "
+                      f"| {stats['p95_ms']:>7.2f} | {e2e_p50:>7.2f} | {size_mb:>8.2f} | {stats['recall']:>6.2%}")
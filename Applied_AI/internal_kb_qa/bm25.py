@@ -0,0 +1,82 @@
+"""
+Local BM25 inverted index over the KB chunks.
+Built at ingest time from the same splits as the vector index and persisted next
+to it, so exact-term lookups (form numbers, policy names) need no embedding call.
+"""
+import os
+import re
+import json
+import math
+from collections import Counter, defaultdict
+
+BM25_NAME = "bm25.json"
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+def tokenize(text):
+    """Lowercased word tokens; identifiers like 'LEA-929' are kept whole and also split into parts."""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if p)
+    return tokens
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks (text + metadata)."""
+
+    def __init__(self, docs, k1=1.5, b=0.75):
+        self.docs = docs
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.doc_len = []
+        for i, doc in enumerate(docs):
+            counts = Counter(tokenize(doc["page_content"]))
+            self.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        n = len(docs)
+        self.avg_len = sum(self.doc_len) / n if n else 0.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def search(self, query, k=4):
+        """Return [(doc, score)] for the top-k chunks."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[i] / self.avg_len)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.docs[i], score) for i, score in top]
+
+    def is_confident(self, results, min_score=8.0, margin=1.5):
+        """High-confidence lexical match: a strong top hit that clearly beats the runner-up."""
+        if not results or results[0][1] < min_score:
+            return False
+        return len(results) == 1 or results[0][1] >= margin * results[1][1]
+
+    def save(self, persist_dir):
+        with open(os.path.join(persist_dir, BM25_NAME), "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.docs}, f)
+
+    @classmethod
+    def load(cls, persist_dir):
+        path = os.path.join(persist_dir, BM25_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["docs"], k1=data["k1"], b=data["b"])
+
+def build_bm25(vectorstore, persist_dir):
+    """Rebuild the lexical index from every chunk currently in the vector store."""
+    stored = vectorstore.get(include=["documents", "metadatas"])
+    docs = [{"id": i, "page_content": text, "metadata": meta or {}}
+            for i, text, meta in zip(stored["ids"], stored["documents"], stored["metadatas"])]
+    index = BM25Index(docs)
+    index.save(persist_dir)
+    return index
@@ -0,0 +1,126 @@
+"""
+Content-addressed on-disk embedding cache.
+Vectors are stored in SQLite keyed by sha256(model + chunk text), so identical
+text is never embedded twice across runs, chunking settings or index rebuilds.
+The cache is bounded by entry count with least-recently-used eviction.
+
+Only document chunks go to disk. Query vectors are kept in a small in-memory
+LRU of their own: a question is embedded more than once per request (answer
+cache lookup, dense retrieval), but one-off questions must not evict corpus
+chunks that every rebuild needs.
+"""
+import time
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+class CachedEmbeddings(Embeddings):
+    """Wraps another Embeddings and only forwards texts that are not cached yet."""
+
+    def __init__(self, underlying, path, model="default", max_entries=500_000, max_queries=1024):
+        self.underlying = underlying
+        self.model = model
+        self.max_entries = max_entries
+        self.max_queries = max_queries
+        self.hits = 0
+        self.misses = 0
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Counted once here and kept up to date on insert/evict, instead of a COUNT(*) scan per store
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def _lookup(self, keys):
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), 500):
+                chunk = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((key, array("f", blob).tolist()) for key, blob in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+                self._conn.commit()
+        return found
+
+    def _store(self, items):
+        now = time.time()
+        with self._lock:
+            # Keys are content hashes, so a row another writer stored first already holds the same vector;
+            # IGNORE keeps rowcount equal to the number of new rows
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items],
+            )
+            self._entries += cursor.rowcount
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self._entries > self.max_entries:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (self._entries - self.max_entries,),
+            )
+            self._entries -= cursor.rowcount
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [cache_key(self.model, t) for t in texts]
+        found = self._lookup(keys)
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {k: t for k, t in zip(keys, texts) if k not in found}
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), vectors))
+            self._store(new.items())
+            found.update(new)
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return [found[k] for k in keys]
+
+    def embed_query(self, text):
+        key = cache_key(self.model, text)
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                return vector
+        vector = self.underlying.embed_query(text)
+        with self._lock:
+            self._queries[key] = vector
+            while len(self._queries) > self.max_queries:
+                self._queries.popitem(last=False)
+        return vector
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+        }
@@ -0,0 +1,147 @@
+"""
+Batched, concurrent embedding client for KB ingest.
+Packs chunks into token-budgeted batches, sends a bounded number of requests
+concurrently with asyncio and retries rate limits / transient errors with backoff.
+Implements the LangChain Embeddings interface so it drops into Chroma.
+
+Sync calls (per-file ingest batches, query embeddings) all run on one
+long-lived event loop thread with one client, so they reuse warm connections
+instead of paying a new event loop and TCP/TLS handshake per call.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+import openai
+from openai import AsyncOpenAI
+from langchain_core.embeddings import Embeddings
+
+from llm_gateway import async_http_client
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+try:
+    import tiktoken
+    # get_encoding downloads the BPE file on first use, which fails offline
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Fall back to the ~4 chars/token rule of thumb
+    _ENCODING = None
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def make_batches(texts, max_tokens=64_000, max_items=512):
+    """Group text indices into batches that stay under the per-request token and input limits."""
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = count_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+_io_loop = None
+_io_loop_lock = threading.Lock()
+
+def _run_sync(coro):
+    """
+    Run a coroutine from sync code on the shared I/O loop thread. Works even when
+    the caller is itself inside a running event loop (e.g. Streamlit).
+    """
+    global _io_loop
+    with _io_loop_lock:
+        if _io_loop is None:
+            _io_loop = asyncio.new_event_loop()
+            threading.Thread(target=_io_loop.run_forever, name="embedding-io", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _io_loop).result()
+
+class BatchedEmbeddings(Embeddings):
+    """OpenAI-compatible embeddings with token-budgeted batching, bounded concurrency and retry."""
+
+    def __init__(self, model="text-embedding-ada-002", max_concurrency=4, max_batch_tokens=64_000,
+                 max_batch_size=512, max_retries=6, base_delay=1.0, base_url=None, timeout=60.0):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.timeout = timeout
+        self.stats = {"embedded": 0, "requests": 0, "retries": 0, "seconds": 0.0}
+        self._async_client = None
+        self._client_lock = threading.Lock()
+
+    def _client(self):
+        """One client for the instance's lifetime; the gateway keeps a connection pool per event loop."""
+        with self._client_lock:
+            if self._async_client is None:
+                # Retries are handled here so the backoff policy is rate-limit aware; the gateway
+                # still pools connections and applies the shared rate / concurrency limits
+                self._async_client = AsyncOpenAI(base_url=self.base_url, timeout=self.timeout, max_retries=0,
+                                                 http_client=async_http_client("kb-embeddings", max_retries=0))
+            return self._async_client
+
+    async def _embed_batch(self, client, semaphore, texts):
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                try:
+                    self.stats["requests"] += 1
+                    response = await client.embeddings.create(model=self.model, input=texts)
+                    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = self._retry_delay(e, attempt)
+            # Sleep outside the semaphore so other batches keep the slots busy
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.base_delay * (2 ** attempt) * (0.5 + random.random())
+
+    async def aembed_documents(self, texts):
+        if not texts:
+            return []
+        start = time.time()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        batches = make_batches(texts, self.max_batch_tokens, self.max_batch_size)
+        client = self._client()
+        results = await asyncio.gather(
+            *(self._embed_batch(client, semaphore, [texts[i] for i in batch]) for batch in batches)
+        )
+
+        vectors = [None] * len(texts)
+        for batch, embedded in zip(batches, results):
+            for i, vector in zip(batch, embedded):
+                vectors[i] = vector
+        self.stats["embedded"] += len(texts)
+        self.stats["seconds"] += time.time() - start
+        return vectors
+
+    async def aembed_query(self, text):
+        return (await self.aembed_documents([text]))[0]
+
+    def embed_documents(self, texts):
+        return _run_sync(self.aembed_documents(list(texts)))
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    @property
+    def embeddings_per_second(self):
+        return self.stats["embedded"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
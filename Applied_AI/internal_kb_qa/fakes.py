@@ -0,0 +1,35 @@
+"""
+Deterministic local stand-ins for the embedding and chat endpoints, so benchmarks
+run offline and give identical numbers from run to run.
+"""
+import hashlib
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from bm25 import tokenize
+
+class HashingEmbeddings(Embeddings):
+    """Signed feature-hashing bag of words: similar wording gives similar vectors, no network."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokenize(text):
+            digest = hashlib.md5(token.encode("utf-8")).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+def fake_llm(answer="See the cited policy for details."):
+    """Chat model that streams a fixed answer character by character."""
+    return FakeListChatModel(responses=[answer])
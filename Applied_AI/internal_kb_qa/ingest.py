@@ -0,0 +1,192 @@
+"""
+Offline ingest step for the internal KB.
+Loads the PDFs in ./docs, splits them and writes the embeddings to a persisted
+Chroma index that run_rag_pipeline() opens at query time.
+
+Ingest is incremental: a manifest next to the index records the content hash,
+mtime and chunk hashes of every file, so only new or changed chunks are
+embedded and vectors of removed files are deleted. It also records the splitter
+settings; changing chunk_size or chunk_overlap re-splits every file, since
+unchanged files would otherwise keep chunks cut the old way.
+"""
+import os
+import json
+import shutil
+import hashlib
+import argparse
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from dotenv import load_dotenv
+
+from bm25 import BM25_NAME, build_bm25
+from rag_pipeline import (DOCS_DIR, PERSIST_DIR, CHUNK_SIZE, CHUNK_OVERLAP, MANIFEST_NAME,
+                          get_embeddings, load_vectorstore)
+
+load_dotenv()
+
+def list_pdfs(docs_dir=DOCS_DIR):
+    return sorted(os.path.join(docs_dir, f) for f in os.listdir(docs_dir) if f.endswith('.pdf'))
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def chunk_ids(source, splits):
+    """Content-addressed ids: identical chunk text in the same file keeps the same vector id."""
+    ids, seen = [], {}
+    for split in splits:
+        key = f"{source}|{split.metadata.get('page', '')}|{split.page_content}"
+        seen[key] = seen.get(key, 0) + 1
+        ids.append(hashlib.sha256(f"{key}|{seen[key]}".encode("utf-8")).hexdigest())
+    return ids
+
+def load_and_split(path, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """Parse one PDF and split it into chunks. Returns (path, splits, page_count)."""
+    pages = PyPDFLoader(path).load()
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return path, text_splitter.split_documents(pages), len(pages)
+
+def iter_parsed(paths, workers=None, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Parse and chunk PDFs on a process pool, yielding each file as soon as it is ready
+    so the embedder can start on early files while later ones are still being parsed.
+    Args:
+        workers: Process count (None = os.cpu_count(), 1 = serial in-process)
+    """
+    parse = partial(load_and_split, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) <= 1:
+        for path in paths:
+            yield parse(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = [pool.submit(parse, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+def load_manifest(persist_dir=PERSIST_DIR):
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"files": {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, persist_dir=PERSIST_DIR):
+    os.makedirs(persist_dir, exist_ok=True)
+    tmp_path = os.path.join(persist_dir, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(persist_dir, MANIFEST_NAME))
+
+def build_index(docs_dir=DOCS_DIR, persist_dir=PERSIST_DIR, full=False, workers=None,
+                embeddings=None, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Bring the persisted vector index in sync with docs_dir.
+    Args:
+        full: Drop the existing index and re-embed everything
+        workers: PDF parsing processes (None = one per CPU)
+        embeddings: Embeddings override (e.g. a local fake for benchmarks)
+    Returns:
+        dict with counts of added, skipped and removed chunks
+    """
+    start = time.time()
+    if full and os.path.isdir(persist_dir):
+        shutil.rmtree(persist_dir)
+
+    manifest = load_manifest(persist_dir)
+    files = manifest["files"]
+    splitter = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+    # Chunks of unchanged files were cut with the old settings: re-split everything
+    resplit = bool(files) and manifest.get("splitter") != splitter
+    if resplit:
+        print(f"↻ Splitter settings changed ({manifest.get('splitter')} -> {splitter}), re-splitting every file")
+    manifest["splitter"] = splitter
+    embeddings = embeddings or get_embeddings()
+    vectorstore = load_vectorstore(persist_dir, embeddings)
+    report = {"added": 0, "skipped": 0, "removed": 0, "files_changed": 0, "files_removed": 0, "pages_parsed": 0,
+              "resplit": resplit}
+
+    # 1. Drop vectors of files that no longer exist
+    on_disk = {os.path.basename(p): p for p in list_pdfs(docs_dir)}
+    for name in [n for n in files if n not in on_disk]:
+        stale_ids = list(files.pop(name)["chunks"])
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        report["removed"] += len(stale_ids)
+        report["files_removed"] += 1
+
+    # 2. Find new or changed files (mtime first, content hash second)
+    to_parse = {}
+    for name, path in on_disk.items():
+        stat = os.stat(path)
+        entry = files.get(name)
+        if resplit:
+            to_parse[path] = (name, file_hash(path), stat)
+            continue
+        if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+            report["skipped"] += len(entry["chunks"])
+            continue
+
+        digest = file_hash(path)
+        if entry and entry["hash"] == digest:
+            # Touched but unchanged: refresh mtime only
+            entry.update(mtime=stat.st_mtime, size=stat.st_size)
+            report["skipped"] += len(entry["chunks"])
+            continue
+        to_parse[path] = (name, digest, stat)
+
+    # 3. Parse in parallel and embed only new chunks as each file arrives
+    for path, splits, page_count in iter_parsed(list(to_parse), workers, chunk_size, chunk_overlap):
+        name, digest, stat = to_parse[path]
+        entry = files.get(name)
+        ids = chunk_ids(name, splits)
+        old_ids = set(entry["chunks"]) if entry else set()
+
+        new = [(i, s) for i, s in zip(ids, splits) if i not in old_ids]
+        if new:
+            vectorstore.add_documents([s for _, s in new], ids=[i for i, _ in new])
+        removed = old_ids - set(ids)
+        if removed:
+            vectorstore.delete(ids=list(removed))
+
+        files[name] = {"hash": digest, "mtime": stat.st_mtime, "size": stat.st_size, "chunks": ids}
+        report["added"] += len(new)
+        report["skipped"] += len(ids) - len(new)
+        report["removed"] += len(removed)
+        report["files_changed"] += 1
+        report["pages_parsed"] += page_count
+
+    # 4. Rebuild the lexical index over the same splits (no embedding cost)
+    if report["added"] or report["removed"] or not os.path.exists(os.path.join(persist_dir, BM25_NAME)):
+        build_bm25(vectorstore, persist_dir)
+
+    # Answer caches key on this, so any document or chunking change invalidates cached answers
+    manifest["version"] = hashlib.sha256(
+        json.dumps([splitter, sorted((n, e["hash"]) for n, e in files.items())]).encode("utf-8")
+    ).hexdigest()
+    manifest["updated_at"] = time.time()
+    save_manifest(manifest, persist_dir)
+
+    report["seconds"] = round(time.time() - start, 2)
+    print(f"✅ Ingest complete -> {persist_dir}: {report['added']} added, "
+          f"{report['skipped']} skipped, {report['removed']} removed ({report['seconds']}s)")
+    if hasattr(embeddings, "stats"):
+        report["embedding_cache"] = embeddings.stats()
+        print(f"   Embedding cache: {report['embedding_cache']['hits']} hits, {report['embedding_cache']['misses']} misses")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or update the persisted KB vector index.")
+    parser.add_argument("--docs-dir", default=DOCS_DIR)
+    parser.add_argument("--persist-dir", default=PERSIST_DIR)
+    parser.add_argument("--full", action="store_true", help="Rebuild the index from scratch")
+    parser.add_argument("--workers", type=int, default=None, help="PDF parsing processes (default: one per CPU)")
+    args = parser.parse_args()
+    build_index(args.docs_dir, args.persist_dir, full=args.full, workers=args.workers)
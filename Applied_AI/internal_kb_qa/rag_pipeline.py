@@ -1,49 +1,240 @@
 import os
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+import json
+import time
+import threading
+from langchain_openai import ChatOpenAI
 from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
 from dotenv import load_dotenv
 
+from embedding_client import BatchedEmbeddings
+from embedding_cache import CachedEmbeddings
+from answer_cache import AnswerCache
+from bm25 import BM25Index
+from retrievers import HybridRetriever, VectorIndexRetriever, to_document
+from vector_index import BACKEND as VECTOR_BACKEND, load_vector_index
+
+from llm_gateway import async_http_client, http_client
+
 load_dotenv()
 
-def run_rag_pipeline(query, docs_dir="./docs"):
-    # 1. Load Documents
-    loaders = [PyPDFLoader(os.path.join(docs_dir, f)) for f in os.listdir(docs_dir) if f.endswith('.pdf')]
-    docs = []
-    for loader in loaders:
-        docs.extend(loader.load())
-    
-    if not docs:
-         # Mock response if no docs found for demo
-         return {
-             "result": "To request a leave of absence, you must submit a form 30 days in advance to HR.",
-             "source_documents": [{"metadata": {"source": "hr_policy.pdf", "page": 2}}]
-         }
-
-    # 2. Chunking
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    splits = text_splitter.split_documents(docs)
-
-    # 3. Embed & Store
-    embeddings = OpenAIEmbeddings()
-    vectorstore = Chroma.from_documents(documents=splits, embedding=embeddings)
-
-    # 4. Retrieval & Q&A
-    llm = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0)
-    qa_chain = RetrievalQA.from_chain_type(
-        llm,
-        retriever=vectorstore.as_retriever(),
-        return_source_documents=True
+DOCS_DIR = "./docs"
+PERSIST_DIR = os.getenv("KB_PERSIST_DIR", "./chroma_db")
+COLLECTION_NAME = "internal_kb"
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+MANIFEST_NAME = "manifest.json"
+ANSWER_CACHE_NAME = "answer_cache.sqlite"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("KB_ANSWER_CACHE_THRESHOLD", "0.95"))
+RETRIEVER_K = 4
+HYBRID_FETCH_K = 20
+LEXICAL_MIN_SCORE = float(os.getenv("KB_LEXICAL_MIN_SCORE", "8.0"))
+LEXICAL_MARGIN = float(os.getenv("KB_LEXICAL_MARGIN", "1.5"))
+
+# Same "stuff" prompt RetrievalQA uses, so streamed and blocking answers match
+QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+MOCK_RESULT = {
+    "result": "To request a leave of absence, you must submit a form 30 days in advance to HR.",
+    "source_documents": [{"metadata": {"source": "hr_policy.pdf", "page": 2}}]
+}
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_CONCURRENCY = int(os.getenv("KB_EMBEDDING_CONCURRENCY", "4"))
+# Lives outside PERSIST_DIR so vectors survive `ingest.py --full` rebuilds
+EMBEDDING_CACHE_PATH = os.getenv("KB_EMBEDDING_CACHE", "./embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("KB_EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+def get_embeddings():
+    return CachedEmbeddings(
+        BatchedEmbeddings(model=EMBEDDING_MODEL, max_concurrency=EMBEDDING_CONCURRENCY),
+        path=EMBEDDING_CACHE_PATH,
+        model=EMBEDDING_MODEL,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
     )
 
-    result = qa_chain({"query": query})
-    return result
+def index_exists(persist_dir=PERSIST_DIR):
+    return os.path.isdir(persist_dir) and bool(os.listdir(persist_dir))
+
+def index_version(persist_dir=PERSIST_DIR):
+    """Content version of the index; changes whenever ingest adds, edits or removes a document."""
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return ""
+    with open(path) as f:
+        return json.load(f).get("version", "")
+
+def get_answer_cache(persist_dir=PERSIST_DIR):
+    return AnswerCache(os.path.join(persist_dir, ANSWER_CACHE_NAME), threshold=ANSWER_CACHE_THRESHOLD)
+
+def serialize_documents(docs):
+    return [{"page_content": d.page_content, "metadata": dict(d.metadata)} for d in docs]
+
+def load_vectorstore(persist_dir=PERSIST_DIR, embeddings=None):
+    """Open the persisted index built by ingest.py (no documents are re-embedded)."""
+    return Chroma(
+        collection_name=COLLECTION_NAME,
+        persist_directory=persist_dir,
+        embedding_function=embeddings or get_embeddings(),
+    )
+
+def manifest_mtime(persist_dir):
+    path = os.path.join(persist_dir, MANIFEST_NAME)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+class KBPipeline:
+    """Query-time resources (embeddings, vector store, BM25, answer cache, LLM), built once per process."""
+
+    def __init__(self, persist_dir=PERSIST_DIR, embeddings=None, llm=None):
+        start = time.perf_counter()
+        self.persist_dir = persist_dir
+        self.manifest_mtime = manifest_mtime(persist_dir)
+        self.version = index_version(persist_dir)
+        self.embeddings = embeddings or get_embeddings()
+        self.vectorstore = load_vectorstore(persist_dir, self.embeddings)
+        self.bm25 = BM25Index.load(persist_dir)
+        self.answer_cache = get_answer_cache(persist_dir)
+        self.llm = llm or ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0, streaming=True, stream_usage=True,
+                                     max_retries=0, http_client=http_client("kb-qa"),
+                                     http_async_client=async_http_client("kb-qa"))
+        self.load_s = time.perf_counter() - start
+        self._vector_index = None
+        self._vector_index_lock = threading.Lock()
+
+    @property
+    def vector_index(self):
+        """KB_VECTOR_BACKEND index (exact matrix or on-disk ANN) for batched search, loaded on first use."""
+        with self._vector_index_lock:
+            if self._vector_index is None:
+                self._vector_index = load_vector_index(self.vectorstore, self.persist_dir, self.version)
+            return self._vector_index
+
+    def dense_retriever(self, k):
+        if VECTOR_BACKEND == "exact":
+            return self.vectorstore.as_retriever(search_kwargs={"k": k})
+        return VectorIndexRetriever(index=self.vector_index, embeddings=self.embeddings, k=k)
+
+    def is_stale(self):
+        """True once ingest has rewritten the manifest since these resources were loaded."""
+        return manifest_mtime(self.persist_dir) != self.manifest_mtime
+
+_pipelines = {}
+_pipelines_lock = threading.Lock()
+
+def get_pipeline(persist_dir=PERSIST_DIR):
+    """
+    Process-wide KBPipeline for persist_dir, shared by all sessions.
+    Returns:
+        (pipeline, cold_start_s) where cold_start_s is 0.0 when an existing pipeline was reused
+    """
+    with _pipelines_lock:
+        pipeline = _pipelines.get(persist_dir)
+        if pipeline is not None and not pipeline.is_stale():
+            return pipeline, 0.0
+        pipeline = _pipelines[persist_dir] = KBPipeline(persist_dir)
+        return pipeline, pipeline.load_s
+
+def reload_pipeline(persist_dir=PERSIST_DIR):
+    """Drop the cached pipeline so the next query reopens the index."""
+    with _pipelines_lock:
+        _pipelines.pop(persist_dir, None)
+
+def stream_rag_pipeline(query, persist_dir=PERSIST_DIR, use_cache=True, pipeline=None):
+    """
+    Streaming variant of run_rag_pipeline.
+    Pass an explicit KBPipeline to bypass the process-wide one (e.g. with local fakes).
+    Yields event dicts in order:
+        {"type": "citations", "source_documents": [...], "retrieval": str, "cached": bool}
+        {"type": "token", "text": str}            (one per streamed answer token)
+        {"type": "done", "result": dict, "timings": {"retrieval_s", "ttft_s", "total_s", "cold_start_s"}}
+    """
+    start = time.perf_counter()
+
+    # 1. Open the persisted index (built once by `python ingest.py`)
+    if pipeline is None and not index_exists(persist_dir):
+        # Mock response if the index has not been built yet for demo
+        yield from _replay({**MOCK_RESULT, "query": query, "retrieval": "mock", "cached": False}, start, 0.0)
+        return
+
+    if pipeline is None:
+        pipeline, cold_start_s = get_pipeline(persist_dir)
+    else:
+        cold_start_s = 0.0
+    bm25 = pipeline.bm25
+    answer_cache = pipeline.answer_cache if use_cache else None
+    query_vector = None
+
+    # 2. Lexical fast path: a confident BM25 hit answers without any embedding call
+    lexical = bm25.search(query, RETRIEVER_K) if bm25 else []
+    if bm25 and bm25.is_confident(lexical, LEXICAL_MIN_SCORE, LEXICAL_MARGIN):
+        retrieval = "lexical"
+        answer_cache = None
+        docs = [to_document(doc) for doc, _ in lexical]
+    else:
+        # 3. Semantic answer cache: reuse answers to near-identical questions
+        query_vector = pipeline.embeddings.embed_query(query)
+        hit = answer_cache.lookup(query_vector, pipeline.version) if answer_cache else None
+        if hit:
+            result, similarity = hit
+            cached = {**result, "query": query, "cached": True, "similarity": similarity}
+            yield from _replay(cached, start, cold_start_s)
+            return
+
+        # 4. Hybrid retrieval (BM25 + dense, fused)
+        if bm25:
+            retrieval = "hybrid"
+            retriever = HybridRetriever(index=bm25, dense=pipeline.dense_retriever(HYBRID_FETCH_K), k=RETRIEVER_K)
+        else:
+            retrieval = "dense"
+            retriever = pipeline.dense_retriever(RETRIEVER_K)
+        docs = retriever.invoke(query)
+
+    # 5. Citations first, then answer tokens as the LLM produces them
+    sources = serialize_documents(docs)
+    retrieval_s = time.perf_counter() - start
+    yield {"type": "citations", "source_documents": sources, "retrieval": retrieval, "cached": False}
+
+    prompt = QA_PROMPT.format(context="\n\n".join(d.page_content for d in docs), question=query)
+    answer, ttft_s = [], None
+    for chunk in pipeline.llm.stream(prompt):
+        if not chunk.content:
+            continue
+        if ttft_s is None:
+            ttft_s = time.perf_counter() - start
+        answer.append(chunk.content)
+        yield {"type": "token", "text": chunk.content}
+
+    result = {"query": query, "result": "".join(answer), "source_documents": sources,
+              "retrieval": retrieval, "cached": False}
+    if answer_cache:
+        answer_cache.store(query, query_vector, result, pipeline.version)
+    timings = {"retrieval_s": retrieval_s, "ttft_s": ttft_s, "total_s": time.perf_counter() - start,
+               "cold_start_s": cold_start_s}
+    yield {"type": "done", "result": result, "timings": timings}
+
+def _replay(result, start, cold_start_s):
+    """Emit a precomputed (mock or cached) result as a stream."""
+    yield {"type": "citations", "source_documents": result["source_documents"],
+           "retrieval": result.get("retrieval", "cache"), "cached": result["cached"]}
+    ttft_s = time.perf_counter() - start
+    yield {"type": "token", "text": result["result"]}
+    timings = {"retrieval_s": ttft_s, "ttft_s": ttft_s, "total_s": time.perf_counter() - start,
+               "cold_start_s": cold_start_s}
+    yield {"type": "done", "result": result, "timings": timings}
+
+def run_rag_pipeline(query, persist_dir=PERSIST_DIR, use_cache=True, pipeline=None):
+    """Blocking wrapper: drains stream_rag_pipeline and returns the final result dict."""
+    for event in stream_rag_pipeline(query, persist_dir, use_cache, pipeline):
+        if event["type"] == "done":
+            return {**event["result"], "timings": event["timings"]}
 
 if __name__ == "__main__":
     # Example usage
     question = "What is the process for submitting a business expense?"
     # result = run_rag_pipeline(question)
     # print(f"Answer: {result['result']}")
-    print("RAG Pipeline script ready. Add PDFs to ./docs to test.")
+    print("RAG Pipeline script ready. Add PDFs to ./docs and run `python ingest.py` to build the index.")
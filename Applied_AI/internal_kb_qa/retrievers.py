@@ -0,0 +1,55 @@
+"""
+LangChain retrievers over the KB: BM25-only, dense over a pluggable vector index,
+and hybrid lexical + dense with reciprocal rank fusion.
+"""
+from typing import Any, List
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+def to_document(doc):
+    return Document(page_content=doc["page_content"], metadata=dict(doc["metadata"]))
+
+def _doc_key(doc):
+    return (doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content)
+
+class BM25Retriever(BaseRetriever):
+    """Lexical-only retrieval; never calls the embedding endpoint."""
+    index: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return [to_document(doc) for doc, _ in self.index.search(query, self.k)]
+
+class VectorIndexRetriever(BaseRetriever):
+    """Dense retrieval through a vector_index backend (exact, IVF or HNSW) instead of Chroma's search."""
+    index: Any
+    embeddings: Any
+    k: int = 4
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        indices, scores = self.index.search([self.embeddings.embed_query(query)], self.k)
+        return [to_document(hit) for hit in self.index.hits(indices[0], scores[0])]
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses BM25 and dense rankings with reciprocal rank fusion: score = sum(1 / (rrf_k + rank)).
+    `dense` is any retriever returning its top fetch_k documents.
+    """
+    index: Any
+    dense: Any
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        lexical = [to_document(doc) for doc, _ in self.index.search(query, self.fetch_k)]
+        dense = self.dense.invoke(query)
+
+        scores, docs = {}, {}
+        for ranking in (lexical, dense):
+            for rank, doc in enumerate(ranking, start=1):
+                key = _doc_key(doc)
+                docs.setdefault(key, doc)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (self.rrf_k + rank)
+        top = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        return [docs[key] for key in top]
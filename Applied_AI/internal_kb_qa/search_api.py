@@ -0,0 +1,88 @@
+"""
+Retrieval-only KB API: batched semantic search over the persisted index, no LLM generation.
+Loads only what search needs (embeddings client and the dense vector index), not the
+full KBPipeline with its chat model, BM25 index and answer cache.
+
+Run: uvicorn search_api:app --port 8001
+"""
+import time
+import threading
+from typing import Any, Dict, List
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+
+from embedding_client import BatchedEmbeddings
+from rag_pipeline import (EMBEDDING_CONCURRENCY, EMBEDDING_MODEL, PERSIST_DIR, index_exists, index_version,
+                          load_vectorstore, manifest_mtime)
+from vector_index import load_vector_index
+
+load_dotenv()
+
+app = FastAPI(title="Internal KB Search API")
+
+class SearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=256)
+    k: int = Field(4, ge=1, le=100)
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    page_content: str
+    metadata: Dict[str, Any]
+
+class SearchResult(BaseModel):
+    query: str
+    hits: List[SearchHit]
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    index_size: int
+    took_ms: float
+
+class SearchIndex:
+    """Embeddings and KB_VECTOR_BACKEND index for persist_dir, built once per process."""
+
+    def __init__(self, persist_dir=PERSIST_DIR):
+        self.persist_dir = persist_dir
+        self.manifest_mtime = manifest_mtime(persist_dir)
+        # Search queries are one-off: embed them directly rather than through the on-disk chunk cache
+        self.embeddings = BatchedEmbeddings(model=EMBEDDING_MODEL, max_concurrency=EMBEDDING_CONCURRENCY)
+        vectorstore = load_vectorstore(persist_dir, self.embeddings)
+        self.index = load_vector_index(vectorstore, persist_dir, index_version(persist_dir))
+
+    def is_stale(self):
+        """True once ingest has rewritten the manifest since the index was loaded."""
+        return manifest_mtime(self.persist_dir) != self.manifest_mtime
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index(persist_dir=PERSIST_DIR):
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None or _search_index.persist_dir != persist_dir or _search_index.is_stale():
+            _search_index = SearchIndex(persist_dir)
+        return _search_index
+
+def search(queries, k):
+    resources = get_search_index(PERSIST_DIR)
+    index = resources.index
+    # One embedding call for the whole batch, then one matrix multiply for top-k
+    vectors = resources.embeddings.embed_documents(queries)
+    indices, scores = index.search(vectors, k)
+    results = [SearchResult(query=q, hits=index.hits(i, s)) for q, i, s in zip(queries, indices, scores)]
+    return results, len(index)
+
+@app.get("/")
+async def root():
+    return {"message": "KB Search API is running", "index_ready": index_exists(PERSIST_DIR)}
+
+@app.post("/search", response_model=SearchResponse)
+async def search_endpoint(request: SearchRequest):
+    if not index_exists(PERSIST_DIR):
+        raise HTTPException(status_code=503, detail="KB index not built. Run `python ingest.py` first.")
+    start = time.perf_counter()
+    results, index_size = await run_in_threadpool(search, request.queries, request.k)
+    return SearchResponse(results=results, index_size=index_size, took_ms=(time.perf_counter() - start) * 1000)
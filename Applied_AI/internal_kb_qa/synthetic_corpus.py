@@ -0,0 +1,115 @@
+"""
+Synthetic policy-PDF generator for offline benchmarks.
+Writes plain-text PDFs with a tiny hand-rolled writer so no PDF library is needed,
+plus a labelled question set whose answers are known (source file + page).
+"""
+import os
+import random
+import json
+import argparse
+
+TOPICS = ["leave", "expense", "travel", "security", "onboarding", "payroll", "equipment", "remote work"]
+VERBS = ["submit", "approve", "review", "request", "escalate", "document", "reimburse", "archive"]
+OWNERS = ["HR", "Finance", "IT", "your manager", "the Security team", "People Ops"]
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_pdf(path, pages):
+    """Write a minimal valid PDF where each page is a list of text lines."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 50 780 Td 12 TL " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref_at = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+def policy_sentence(rng, topic, code=None):
+    return policy_fact(rng, topic, code)["text"]
+
+def policy_fact(rng, topic, code=None):
+    fact = {
+        "topic": topic,
+        "verb": rng.choice(VERBS),
+        "owner": rng.choice(OWNERS),
+        "days": rng.randint(1, 60),
+        "code": code or f"{topic[:3].upper()}-{rng.randint(100, 999)}",
+    }
+    fact["text"] = (f"To {fact['verb']} a {fact['topic']} item, contact {fact['owner']} "
+                    f"within {fact['days']} days using form {fact['code']}.")
+    return fact
+
+def question_for(rng, fact):
+    """Half exact-identifier lookups (lexical-friendly), half paraphrases (dense-friendly)."""
+    if rng.random() < 0.5:
+        return f"What is form {fact['code']} used for?"
+    return f"Who do I contact to {fact['verb']} a {fact['topic']} item within {fact['days']} days?"
+
+def generate_labelled_corpus(out_dir, n_docs=20, pages_per_doc=10, lines_per_page=50, n_questions=0, seed=0):
+    """
+    Generate n_docs policy PDFs and n_questions labelled questions.
+    Returns:
+        (paths, questions) where each question is {"question", "source", "page"}
+        and page is 0-based like PyPDFLoader metadata
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    paths, facts = [], []
+    serial = 0
+    for d in range(n_docs):
+        topic = TOPICS[d % len(TOPICS)]
+        path = os.path.join(out_dir, f"{topic.replace(' ', '_')}_policy_{d:04d}.pdf")
+        pages = []
+        for p in range(pages_per_doc):
+            lines = []
+            for _ in range(lines_per_page):
+                serial += 1
+                # Unique form codes so every question has exactly one correct page
+                fact = policy_fact(rng, topic, code=f"{topic[:3].upper()}-{serial:06d}")
+                facts.append({**fact, "source": path, "page": p})
+                lines.append(fact["text"])
+            pages.append(lines)
+        write_pdf(path, pages)
+        paths.append(path)
+
+    questions = [
+        {"question": question_for(rng, fact), "source": fact["source"], "page": fact["page"]}
+        for fact in rng.sample(facts, min(n_questions, len(facts)))
+    ]
+    return paths, questions
+
+def generate_corpus(out_dir, n_docs=20, pages_per_doc=10, lines_per_page=50, seed=0):
+    """Generate n_docs policy PDFs. Returns the list of written paths."""
+    paths, _ = generate_labelled_corpus(out_dir, n_docs, pages_per_doc, lines_per_page, seed=seed)
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic policy PDF corpus.")
+    parser.add_argument("--out-dir", default="./bench_docs")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=0, help="Also write questions.jsonl with labels")
+    args = parser.parse_args()
+    paths, questions = generate_labelled_corpus(args.out_dir, args.docs, args.pages, n_questions=args.questions)
+    print(f"📄 Wrote {len(paths)} PDFs to {args.out_dir}")
+    if questions:
+        with open(os.path.join(args.out_dir, "questions.jsonl"), "w") as f:
+            f.writelines(json.dumps(q) + "\n" for q in questions)
+        print(f"❓ Wrote {len(questions)} labelled questions to {args.out_dir}/questions.jsonl")
@@ -0,0 +1,225 @@
+"""
+Vector indexes over the persisted KB embeddings for batched top-k search.
+
+Backends (selected with KB_VECTOR_BACKEND):
+    exact - brute-force cosine over an in-memory float32 matrix
+    ivf   - inverted file (k-means lists) with float16/int8 vectors memory-mapped
+            from disk; `nprobe` trades recall for latency
+    hnsw  - HNSW graph via the optional hnswlib package; `ef` trades recall for latency
+"""
+import os
+import json
+import numpy as np
+
+BACKEND = os.getenv("KB_VECTOR_BACKEND", "exact")
+IVF_NPROBE = int(os.getenv("KB_IVF_NPROBE", "8"))
+IVF_DTYPE = os.getenv("KB_IVF_DTYPE", "int8")
+HNSW_EF = int(os.getenv("KB_HNSW_EF", "64"))
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def top_k(scores, k):
+    """Row-wise top-k (indices, scores) of a (queries x docs) score matrix, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0), dtype=np.float32)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+class VectorIndex:
+    """Shared chunk bookkeeping; subclasses implement search(query_vectors, k) -> (indices, scores)."""
+
+    def __init__(self, ids, documents, metadatas):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [m or {} for m in metadatas]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def hits(self, indices, scores):
+        """Turn one row of search() output into result dicts."""
+        return [
+            {"id": self.ids[i], "score": float(s), "page_content": self.documents[i], "metadata": self.metadatas[i]}
+            for i, s in zip(indices, scores) if i >= 0
+        ]
+
+    def _save_docs(self, path, version="", **extra):
+        with open(os.path.join(path, "docs.json"), "w") as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "metadatas": self.metadatas, **extra}, f)
+        # Written last: a readable meta.json marks a complete build of this KB version
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"version": version, **extra}, f)
+
+    @staticmethod
+    def _load_docs(path):
+        with open(os.path.join(path, "docs.json")) as f:
+            return json.load(f)
+
+    @staticmethod
+    def built_version(path):
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f).get("version")
+
+class ExactIndex(VectorIndex):
+    """Brute-force cosine search: one matrix multiply for a whole batch of queries."""
+
+    def __init__(self, ids, vectors, documents, metadatas):
+        super().__init__(ids, documents, metadatas)
+        self.matrix = normalize_rows(vectors) if len(self.ids) else np.zeros((0, 0), dtype=np.float32)
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore):
+        stored = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+        return cls(stored["ids"], stored["embeddings"], stored["documents"], stored["metadatas"])
+
+    def search(self, query_vectors, k=4):
+        """Returns (indices, scores) arrays of shape (n_queries, k)."""
+        queries = normalize_rows(query_vectors)
+        if not len(self.ids):
+            return top_k(np.zeros((len(queries), 0), dtype=np.float32), k)
+        return top_k(queries @ self.matrix.T, k)
+
+def _spherical_kmeans(vectors, n_lists, iters=10, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+    for _ in range(iters):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = vectors[assign == c]
+            # Re-seed empty lists from a random point
+            centroids[c] = members.sum(axis=0) if len(members) else vectors[rng.integers(len(vectors))]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+def _assign(vectors, centroids, batch=65_536):
+    return np.concatenate([np.argmax(vectors[i:i + batch] @ centroids.T, axis=1)
+                           for i in range(0, len(vectors), batch)])
+
+class IVFIndex(VectorIndex):
+    """
+    Inverted-file ANN index. Vectors are grouped by nearest k-means centroid and
+    stored list-contiguous in a memory-mapped .npy as float16 or int8 (per-dimension
+    scale), so only the probed lists are paged in at query time.
+    """
+
+    def __init__(self, path, nprobe=IVF_NPROBE):
+        docs = self._load_docs(path)
+        super().__init__(docs["ids"], docs["documents"], docs["metadatas"])
+        meta = np.load(os.path.join(path, "ivf.npz"))
+        self.centroids = meta["centroids"]
+        self.offsets = meta["offsets"]
+        self.scale = meta["scale"] if meta["scale"].size else None
+        self.codes = np.load(os.path.join(path, "codes.npy"), mmap_mode="r")
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, path, ids, vectors, documents, metadatas, n_lists=None, dtype=IVF_DTYPE,
+              nprobe=IVF_NPROBE, train_size=50_000, version=""):
+        os.makedirs(path, exist_ok=True)
+        vectors = normalize_rows(vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), min(train_size, len(vectors)), replace=False)]
+        centroids = _spherical_kmeans(sample, min(n_lists, len(sample)))
+
+        # Reorder vectors so every list is one contiguous slice
+        assign = _assign(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+
+        codes = np.lib.format.open_memmap(os.path.join(path, "codes.npy"), mode="w+",
+                                          dtype=np.int8 if dtype == "int8" else np.float16, shape=vectors.shape)
+        if dtype == "int8":
+            scale = np.abs(vectors).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            codes[:] = np.round(vectors[order] / scale).astype(np.int8)
+        else:
+            scale = np.zeros(0, dtype=np.float32)
+            codes[:] = vectors[order].astype(np.float16)
+        codes.flush()
+        del codes
+
+        np.savez(os.path.join(path, "ivf.npz"), centroids=centroids, offsets=offsets, scale=scale)
+        ordered = VectorIndex([ids[i] for i in order], [documents[i] for i in order], [metadatas[i] for i in order])
+        ordered._save_docs(path, version=version, dtype=dtype)
+        return cls(path, nprobe=nprobe)
+
+    def search(self, query_vectors, k=4, nprobe=None):
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        queries = normalize_rows(query_vectors)
+        # Fold the int8 dequantisation scale into the query instead of the candidates
+        scaled = queries * self.scale if self.scale is not None else queries
+        probes = top_k(queries @ self.centroids.T, nprobe)[0]
+
+        all_idx = np.full((len(queries), k), -1, dtype=np.int64)
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, lists in enumerate(probes):
+            candidates = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+            if not len(candidates):
+                continue
+            scores = self.codes[candidates].astype(np.float32) @ scaled[q]
+            idx, best = top_k(scores[None, :], k)
+            all_idx[q, :idx.shape[1]] = candidates[idx[0]]
+            all_scores[q, :idx.shape[1]] = best[0]
+        return all_idx, all_scores
+
+class HNSWIndex(VectorIndex):
+    """HNSW graph index (requires `pip install hnswlib`)."""
+
+    def __init__(self, path, ef=HNSW_EF):
+        import hnswlib
+        docs = self._load_docs(path)
+        super().__init__(docs["ids"], docs["documents"], docs["metadatas"])
+        self.index = hnswlib.Index(space="ip", dim=docs["dim"])
+        self.index.load_index(os.path.join(path, "hnsw.bin"))
+        self.ef = ef
+
+    @classmethod
+    def build(cls, path, ids, vectors, documents, metadatas, M=16, ef_construction=200, ef=HNSW_EF, version=""):
+        import hnswlib
+        os.makedirs(path, exist_ok=True)
+        vectors = normalize_rows(vectors)
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(max_elements=len(vectors), ef_construction=ef_construction, M=M)
+        index.add_items(vectors, np.arange(len(vectors)))
+        index.save_index(os.path.join(path, "hnsw.bin"))
+        VectorIndex(ids, documents, metadatas)._save_docs(path, version=version, dim=vectors.shape[1])
+        return cls(path, ef=ef)
+
+    def search(self, query_vectors, k=4, ef=None):
+        k = min(k, len(self.ids))
+        self.index.set_ef(max(ef or self.ef, k))
+        labels, distances = self.index.knn_query(normalize_rows(query_vectors), k=k)
+        # hnswlib "ip" distance is 1 - dot product
+        return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+ANN_BACKENDS = {"ivf": IVFIndex, "hnsw": HNSWIndex}
+
+def load_vector_index(vectorstore, persist_dir, version="", backend=BACKEND):
+    """Open the index for `backend`, (re)building the on-disk ANN files when the KB version changed."""
+    if backend == "exact":
+        return ExactIndex.from_vectorstore(vectorstore)
+    if backend not in ANN_BACKENDS:
+        raise ValueError(f"Unknown vector backend '{backend}'. Choose from: exact, {', '.join(ANN_BACKENDS)}")
+
+    index_cls = ANN_BACKENDS[backend]
+    path = os.path.join(persist_dir, f"ann_{backend}")
+    if VectorIndex.built_version(path) == version:
+        return index_cls(path)
+    stored = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+    if not stored["ids"]:
+        return ExactIndex([], [], [], [])
+    return index_cls.build(path, stored["ids"], stored["embeddings"], stored["documents"], stored["metadatas"],
+                           version=version)
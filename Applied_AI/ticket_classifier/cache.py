@@ -0,0 +1,206 @@
+"""
+Classification result cache for near-identical support tickets.
+
+Tier 1: exact match on normalised ticket text.
+Tier 2 (optional): near-duplicate match via 64-bit SimHash, with LSH banding so
+lookups only compare against tickets that share a band.
+
+Storage uses a small Redis-style async interface (get / set with ex=ttl). A Redis
+server is used when REDIS_URL is set and the `redis` package is installed;
+otherwise an in-process TTL + LRU store is used. A Redis outage degrades to cache
+misses (with a logged warning) rather than failing classification.
+"""
+import os
+import re
+import time
+import json
+import hashlib
+import logging
+import unicodedata
+from collections import OrderedDict, defaultdict
+
+CACHE_TTL_S = int(os.getenv("CACHE_TTL_S", "86400"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_NEAR_DUP = os.getenv("CACHE_NEAR_DUP", "1") == "1"
+CACHE_NEAR_DUP_MAX_DISTANCE = int(os.getenv("CACHE_NEAR_DUP_MAX_DISTANCE", "6"))
+KEY_PREFIX = "ticket-cls:"
+
+logger = logging.getLogger(__name__)
+
+def normalise(text):
+    """Case, punctuation and whitespace-insensitive form of a ticket."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = re.sub(r"['’]", "", text)  # "can't" == "cant"
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+def cache_key(normalised):
+    return KEY_PREFIX + hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+def simhash(normalised, bits=64):
+    """Charikar SimHash over word unigrams and bigrams."""
+    words = normalised.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    weights = [0] * bits
+    for feature in features:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(bits):
+            weights[i] += 1 if h >> i & 1 else -1
+    return sum(1 << i for i, w in enumerate(weights) if w > 0)
+
+class InProcessCache:
+    """Redis-compatible subset (get/set/delete) with per-key TTL and LRU eviction."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+
+    async def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key, value, ex=None):
+        self._data[key] = (value, time.monotonic() + ex if ex else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+class FailOpenRedis:
+    """
+    Redis client wrapper where connection errors and timeouts read as misses and
+    skipped writes, so an unreachable Redis never takes down classification.
+    Warns once when Redis becomes unreachable and once when it is back.
+    """
+
+    def __init__(self, client, errors):
+        self.client = client
+        self.errors = errors
+        self.failures = 0
+        self._down = False
+
+    async def _call(self, method, *args, **kwargs):
+        try:
+            result = await getattr(self.client, method)(*args, **kwargs)
+        except self.errors as e:
+            self.failures += 1
+            if not self._down:
+                self._down = True
+                logger.warning("Redis cache unavailable, serving without it: %s", e)
+            return None
+        if self._down:
+            self._down = False
+            logger.warning("Redis cache reachable again")
+        return result
+
+    async def get(self, key):
+        return await self._call("get", key)
+
+    async def set(self, key, value, ex=None):
+        await self._call("set", key, value, ex=ex)
+
+    async def delete(self, key):
+        await self._call("delete", key)
+
+def make_backend():
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        try:
+            import redis.asyncio as redis
+            from redis.exceptions import ConnectionError, TimeoutError
+            return FailOpenRedis(redis.Redis.from_url(redis_url, decode_responses=True,
+                                                      socket_connect_timeout=1, socket_timeout=1),
+                                 (ConnectionError, TimeoutError, OSError))
+        except ImportError:
+            pass
+    return InProcessCache()
+
+class TicketCache:
+    """Exact + near-duplicate cache of TicketResponse dicts, with hit-rate metrics."""
+
+    def __init__(self, backend=None, ttl_s=CACHE_TTL_S, near_dup=CACHE_NEAR_DUP,
+                 max_distance=CACHE_NEAR_DUP_MAX_DISTANCE, bands=None, max_fingerprints=CACHE_MAX_ENTRIES):
+        if not 0 <= max_distance < 64:
+            raise ValueError(f"max_distance must be between 0 and 63 bits, got {max_distance}")
+        # LSH: band value -> {simhash: exact cache key}; stale keys simply miss in the backend.
+        # With b bands any fingerprint within b - 1 bits shares at least one band (pigeonhole), so
+        # fewer bands than max_distance + 1 would silently miss near-duplicates the threshold allows.
+        # Default to 8 (wider bands, fewer candidates) and add bands only when the distance needs them.
+        if bands is None:
+            bands = max(8, max_distance + 1)
+        elif max_distance > bands - 1:
+            raise ValueError(f"{bands} LSH bands only guarantee matches within {bands - 1} bits; "
+                             f"use at least {max_distance + 1} bands for max_distance={max_distance}")
+        self.backend = backend or make_backend()
+        self.ttl_s = ttl_s
+        self.near_dup = near_dup
+        self.max_distance = max_distance
+        self.bands = bands
+        self._band_index = [defaultdict(dict) for _ in range(bands)]
+        self._fingerprints = OrderedDict()
+        self.max_fingerprints = max_fingerprints
+        self.stats = {"exact_hits": 0, "near_hits": 0, "misses": 0}
+
+    def _band_values(self, fingerprint):
+        width = 64 // self.bands
+        return [(fingerprint >> (i * width)) & ((1 << width) - 1) for i in range(self.bands)]
+
+    async def get(self, ticket_text):
+        """Returns (result_dict, tier) with tier in {"exact", "near"}, or (None, None)."""
+        normalised = normalise(ticket_text)
+        value = await self.backend.get(cache_key(normalised))
+        if value is not None:
+            self.stats["exact_hits"] += 1
+            return json.loads(value), "exact"
+
+        if self.near_dup:
+            fingerprint = simhash(normalised)
+            candidates = {}
+            for band, band_value in enumerate(self._band_values(fingerprint)):
+                candidates.update(self._band_index[band].get(band_value, {}))
+            # Nearest candidates first
+            for other, key in sorted(candidates.items(), key=lambda c: bin(c[0] ^ fingerprint).count("1")):
+                if bin(other ^ fingerprint).count("1") > self.max_distance:
+                    break
+                value = await self.backend.get(key)
+                if value is not None:
+                    self.stats["near_hits"] += 1
+                    return json.loads(value), "near"
+
+        self.stats["misses"] += 1
+        return None, None
+
+    async def set(self, ticket_text, result):
+        normalised = normalise(ticket_text)
+        key = cache_key(normalised)
+        await self.backend.set(key, json.dumps(result), ex=self.ttl_s)
+        if self.near_dup:
+            fingerprint = simhash(normalised)
+            for band, band_value in enumerate(self._band_values(fingerprint)):
+                self._band_index[band][band_value][fingerprint] = key
+            self._fingerprints[fingerprint] = None
+            self._fingerprints.move_to_end(fingerprint)
+            while len(self._fingerprints) > self.max_fingerprints:
+                self._forget(self._fingerprints.popitem(last=False)[0])
+
+    def _forget(self, fingerprint):
+        for band, band_value in enumerate(self._band_values(fingerprint)):
+            bucket = self._band_index[band].get(band_value)
+            if bucket is not None:
+                bucket.pop(fingerprint, None)
+                if not bucket:
+                    del self._band_index[band][band_value]
+
+    def metrics(self):
+        hits = self.stats["exact_hits"] + self.stats["near_hits"]
+        total = hits + self.stats["misses"]
+        return {**self.stats, "hit_rate": hits / total if total else 0.0,
+                "backend": type(self.backend).__name__, "backend_errors": getattr(self.backend, "failures", 0)}
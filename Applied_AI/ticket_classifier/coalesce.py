@@ -0,0 +1,47 @@
+"""
+Single-flight coalescing: concurrent callers with the same key share one
+in-flight upstream call and all receive its result (or its exception).
+"""
+import asyncio
+
+class SingleFlight:
+    """Async single-flight group with leader / coalesced counters."""
+
+    def __init__(self):
+        self._inflight = {}  # key -> [task, waiters]
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key, fn):
+        """
+        Args:
+            key: coalescing key (e.g. normalised input text)
+            fn: zero-argument coroutine function; only called by the first caller
+        """
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.stats["leaders"] += 1
+            entry = [asyncio.ensure_future(fn()), 0]
+            self._inflight[key] = entry
+            entry[0].add_done_callback(lambda _: self._forget(key, entry))
+        else:
+            self.stats["coalesced"] += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # shield: one caller disconnecting must not cancel the call for the others
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Every caller has gone away; stop the upstream call
+                task.cancel()
+
+    def _forget(self, key, entry):
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def metrics(self):
+        total = self.stats["leaders"] + self.stats["coalesced"]
+        return {**self.stats, "in_flight": len(self._inflight),
+                "coalesced_rate": self.stats["coalesced"] / total if total else 0.0}
@@ -22,5 +22,25 @@ def test_api():
         print(f"❌ Connection Failed: {e}")
         print("\nNote: Make sure the FastAPI server is running with 'uvicorn main:app --reload'")
 
+def test_batch_api():
+    url = "http://127.0.0.1:8000/classify/batch"
+    payload = {
+        "tickets": [
+            {"ticket_text": "I was charged twice for my subscription this month."},
+            {"ticket_text": "Could you add dark mode to the dashboard?"},
+            {"ticket_text": "The export button throws a 500 error since yesterday's update."},
+        ]
+    }
+
+    print(f"\nTesting batch API at: {url}")
+    try:
+        with requests.post(url, json=payload, stream=True) as response:
+            for line in response.iter_lines():
+                if line:
+                    print(json.loads(line))
+    except Exception as e:
+        print(f"❌ Connection Failed: {e}")
+
 if __name__ == "__main__":
     test_api()
+    test_batch_api()
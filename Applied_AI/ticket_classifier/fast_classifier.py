@@ -0,0 +1,205 @@
+"""
+Local fast path for ticket classification.
+A hashing-features + linear model trained on past LLM-labelled tickets answers
+confident cases in well under a millisecond (the trained weights are scored
+directly on the hashed features); low-confidence tickets are escalated to the LLM.
+
+scikit-learn, numpy and joblib are imported only when a model is trained or
+loaded, so the API runs without them when no model file exists.
+
+Training data is the label log: raw customer ticket text plus the LLM's labels.
+The API only writes it when LOG_LABELS=1, and rotates it to <path>.1 once it
+exceeds LABEL_LOG_MAX_MB, so treat the file as customer data.
+
+Train:  python fast_classifier.py train --data labelled_tickets.jsonl
+Report: python fast_classifier.py report --data labelled_tickets.jsonl
+"""
+import os
+import json
+import time
+import argparse
+from collections import Counter, defaultdict
+
+MODEL_PATH = os.getenv("FAST_MODEL_PATH", "fast_classifier.joblib")
+LABEL_LOG_PATH = os.getenv("LABEL_LOG_PATH", "labelled_tickets.jsonl")
+LABEL_LOG_MAX_BYTES = int(float(os.getenv("LABEL_LOG_MAX_MB", "100")) * (1 << 20))
+CONFIDENCE_THRESHOLD = float(os.getenv("FAST_PATH_THRESHOLD", "0.85"))
+
+def load_labelled(path=LABEL_LOG_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def log_labelled(ticket_text, result, path=LABEL_LOG_PATH, max_bytes=LABEL_LOG_MAX_BYTES):
+    """Append an LLM-labelled ticket to the training log, keeping one rotated generation (<path>.1)."""
+    try:
+        if os.path.getsize(path) >= max_bytes:
+            os.replace(path, path + ".1")
+    except FileNotFoundError:
+        pass
+    with open(path, "a") as f:
+        f.write(json.dumps({"ticket_text": ticket_text, **result}) + "\n")
+
+class FastTicketClassifier:
+    """Priority (multiclass) + tags (multilabel) linear models over hashed word n-grams."""
+
+    def __init__(self, threshold=CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.actions = {}
+
+    def fit(self, records):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.multiclass import OneVsRestClassifier
+        from sklearn.preprocessing import MultiLabelBinarizer
+
+        priorities = {r["priority"] for r in records}
+        if len(priorities) < 2:
+            raise ValueError(f"Need labelled tickets with at least two priorities to train, got {sorted(priorities)}; "
+                             "keep logging LLM labels and retry")
+        self.vectorizer = HashingVectorizer(n_features=2 ** 18, ngram_range=(1, 2), alternate_sign=False,
+                                            norm="l2", lowercase=True)
+        self.priority_model = SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=50, random_state=0)
+        self.tags_binarizer = MultiLabelBinarizer()
+        self.tags_model = OneVsRestClassifier(SGDClassifier(loss="log_loss", alpha=1e-5, max_iter=50, random_state=0))
+
+        X = self.vectorizer.transform([r["ticket_text"] for r in records])
+        self.priority_model.fit(X, [r["priority"] for r in records])
+        Y = self.tags_binarizer.fit_transform([sorted(r["tags"]) for r in records])
+        self.tags_model.fit(X, Y)
+
+        # Most common LLM-suggested action per (priority, tag set)
+        by_label = defaultdict(Counter)
+        for r in records:
+            by_label[(r["priority"], tuple(sorted(r["tags"])))][r["suggested_action"]] += 1
+            by_label[(None, None)][r["suggested_action"]] += 1
+        self.actions = {label: counts.most_common(1)[0][0] for label, counts in by_label.items()}
+        self._compile()
+        return self
+
+    def _compile(self):
+        """
+        Copy the linear models into feature-major weight matrices so prediction is a
+        gather over the document's few non-zero hashed features instead of a pass
+        through sklearn's validation and a product with 2^18-wide coefficient rows.
+        Matches predict_proba of the sklearn models (logistic OvR, normalised for
+        multiclass priority).
+        """
+        import numpy as np
+
+        self._priority_w = np.ascontiguousarray(self.priority_model.coef_.T)
+        self._priority_b = self.priority_model.intercept_.copy()
+        n_features = self._priority_w.shape[0]
+        tag_w = np.zeros((n_features, len(self.tags_model.estimators_)))
+        tag_b = np.zeros(len(self.tags_model.estimators_))
+        for i, estimator in enumerate(self.tags_model.estimators_):
+            if hasattr(estimator, "coef_"):
+                tag_w[:, i] = estimator.coef_[0]
+                tag_b[i] = estimator.intercept_[0]
+            else:
+                # Tag present in every (or no) training ticket: sklearn predicts a constant
+                tag_b[i] = 30.0 if estimator.y_[0] else -30.0
+        self._tag_w, self._tag_b = tag_w, tag_b
+
+    def __getstate__(self):
+        # The compiled weights duplicate the models; rebuild them on load instead of saving twice
+        return {k: v for k, v in self.__dict__.items() if k not in ("_priority_w", "_priority_b", "_tag_w", "_tag_b")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "priority_model" in state:
+            self._compile()
+
+    def predict(self, ticket_text):
+        """
+        Returns:
+            (result_dict, confidence); confidence is the weakest of the priority
+            probability and each tag's yes/no probability
+        """
+        import numpy as np
+
+        X = self.vectorizer.transform([ticket_text])
+        values = X.data
+        priority_scores = values @ self._priority_w[X.indices] + self._priority_b
+        priority_scores = 1.0 / (1.0 + np.exp(-priority_scores))
+        if len(priority_scores) == 1:
+            priority_proba = np.array([1.0 - priority_scores[0], priority_scores[0]])
+        else:
+            priority_proba = priority_scores / priority_scores.sum()
+        best = int(np.argmax(priority_proba))
+        priority = self.priority_model.classes_[best]
+
+        tag_proba = 1.0 / (1.0 + np.exp(-(values @ self._tag_w[X.indices] + self._tag_b)))
+        tags = [t for t, p in zip(self.tags_binarizer.classes_, tag_proba) if p >= 0.5]
+        if not tags:
+            tags = [self.tags_binarizer.classes_[int(np.argmax(tag_proba))]]
+        confidence = min(priority_proba[best], float(np.min(np.maximum(tag_proba, 1 - tag_proba))))
+
+        action = self.actions.get((priority, tuple(sorted(tags))), self.actions[(None, None)])
+        return {"tags": list(tags), "priority": priority, "suggested_action": action}, float(confidence)
+
+    def classify(self, ticket_text):
+        """Result dict when confident enough to skip the LLM, else None."""
+        result, confidence = self.predict(ticket_text)
+        return result if confidence >= self.threshold else None
+
+    def save(self, path=MODEL_PATH):
+        import joblib
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path=MODEL_PATH):
+        if not os.path.exists(path):
+            return None
+        import joblib
+        return joblib.load(path)
+
+def report(model, records):
+    """Escalation rate, agreement with LLM labels on the fast path, and latency distribution."""
+    import numpy as np
+
+    latencies, escalated, agree = [], 0, 0
+    for r in records:
+        start = time.perf_counter()
+        result, confidence = model.predict(r["ticket_text"])
+        latencies.append(time.perf_counter() - start)
+        if confidence < model.threshold:
+            escalated += 1
+        elif result["priority"] == r["priority"] and set(result["tags"]) == set(r["tags"]):
+            agree += 1
+
+    fast = len(records) - escalated
+    lat_us = np.array(latencies) * 1e6
+    print(f"📊 Fast-path report on {len(records)} tickets (threshold {model.threshold})")
+    print(f"  Escalated to LLM : {escalated} ({escalated / len(records):.1%})")
+    print(f"  Answered locally : {fast} ({fast / len(records):.1%}), "
+          f"agreement with LLM labels {agree / fast:.1%}" if fast else "  Answered locally : 0")
+    print(f"  Latency (µs)     : p50 {np.percentile(lat_us, 50):.0f} | p95 {np.percentile(lat_us, 95):.0f} "
+          f"| p99 {np.percentile(lat_us, 99):.0f} | max {lat_us.max():.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or evaluate the local ticket classifier.")
+    parser.add_argument("command", choices=["train", "report"])
+    parser.add_argument("--data", default=LABEL_LOG_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    args = parser.parse_args()
+
+    records = load_labelled(args.data)
+    if args.command == "train":
+        from sklearn.model_selection import train_test_split
+
+        train, test = train_test_split(records, test_size=0.2, random_state=42)
+        try:
+            model = FastTicketClassifier(threshold=args.threshold).fit(train)
+            report(model, test)
+            # Ship a model trained on everything once the held-out numbers look right
+            FastTicketClassifier(threshold=args.threshold).fit(records).save(args.model)
+        except ValueError as e:
+            raise SystemExit(f"Not training: {e}")
+        print(f"✅ Saved model to {args.model}")
+    else:
+        model = FastTicketClassifier.load(args.model)
+        if model is None:
+            raise SystemExit(f"No model at {args.model}. Run `python fast_classifier.py train` first.")
+        model.threshold = args.threshold
+        report(model, records)
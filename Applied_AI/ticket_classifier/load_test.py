@@ -0,0 +1,73 @@
+"""
+Concurrency load test for the classifier API against the repo's mock LLM.
+
+1. MOCK_LATENCY_S=0.5 python -m llm_gateway.mock_server      (port 8200)
+2. TICKET_SHORTCUTS=0 OPENAI_API_KEY=mock OPENAI_BASE_URL=http://127.0.0.1:8200/v1 uvicorn main:app --port 8000
+3. python load_test.py
+
+TICKET_SHORTCUTS=0 sends every ticket to the LLM (no result cache, fast path or
+coalescing), so the numbers measure LLM concurrency scaling. The route split from
+/stats is printed at the end to confirm it.
+"""
+import time
+import asyncio
+import argparse
+import httpx
+
+TICKETS = [
+    "I can't log into my account and I need to reset my password immediately.",
+    "I was charged twice for my subscription this month.",
+    "Could you add dark mode to the dashboard?",
+    "The export button throws a 500 error since yesterday's update.",
+]
+
+async def run_level(url, concurrency, total):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    # Distinct text per request, so repeats can't be answered from the API's cache
+    run = f"{time.time_ns():x}-c{concurrency}"
+    for i in range(total):
+        queue.put_nowait(f"{TICKETS[i % len(TICKETS)]} (ref {run}-{i})")
+
+    async def worker(client):
+        nonlocal errors
+        while not queue.empty():
+            text = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json={"ticket_text": text})
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0
+    return len(latencies) / elapsed, p50, p95, errors
+
+async def main(url, levels, requests_per_level):
+    print(f"🚀 Load testing {url}")
+    for concurrency in levels:
+        total = max(requests_per_level, concurrency * 2)
+        rps, p50, p95, errors = await run_level(url, concurrency, total)
+        print(f"  concurrency {concurrency:>3}: {rps:7.1f} req/s | p50 {p50:6.0f} ms | p95 {p95:6.0f} ms | errors {errors}")
+    async with httpx.AsyncClient(timeout=10) as client:
+        routes = (await client.get(url.rsplit("/", 1)[0] + "/stats")).json()["routes"]
+    print(f"  routes: {routes}")
+    if routes["cache"] or routes["fast_path"]:
+        print("  ⚠️ some requests skipped the LLM; run the API with TICKET_SHORTCUTS=0 to measure LLM scaling")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure classifier throughput vs. client concurrency.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000/classify")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.url, args.concurrency, args.requests))
@@ -1,14 +1,49 @@
 import os
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import json
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from cache import TicketCache, normalise
+from coalesce import SingleFlight
+from fast_classifier import FastTicketClassifier, log_labelled
+from parsing import OutputParseError, ParseStats, parse_model
+
+from llm_gateway import async_openai_client, metrics as gateway_metrics
+
 load_dotenv()
 
-app = FastAPI(title="Support Ticket Classifier API")
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-key-here"))
+# This app's share of upstream capacity; pooling, rate limiting, retries and the
+# global adaptive concurrency limit live in the shared gateway
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "20"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+
+client = async_openai_client("ticket-classifier")
+llm_slots = asyncio.Semaphore(MAX_CONCURRENCY)
+ticket_cache = TicketCache()
+# 0 sends every ticket to the LLM: no result cache, fast path or coalescing (for load tests)
+SHORTCUTS = os.getenv("TICKET_SHORTCUTS", "1") == "1"
+# Local model trained on past LLM labels; None until `python fast_classifier.py train` has run
+fast_model = FastTicketClassifier.load()
+# Opt-in: the label log stores raw customer ticket text (see fast_classifier.py)
+LOG_LABELS = os.getenv("LOG_LABELS", "0") == "1"
+route_stats = {"cache": 0, "fast_path": 0, "llm": 0}
+parse_stats = ParseStats()
+# Identical tickets arriving together share one upstream call
+llm_flights = SingleFlight()
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await client.close()
+
+app = FastAPI(title="Support Ticket Classifier API", lifespan=lifespan)
 
 class TicketRequest(BaseModel):
     ticket_text: str
@@ -18,36 +53,173 @@ class TicketResponse(BaseModel):
     priority: str
     suggested_action: str
 
+class BatchRequest(BaseModel):
+    tickets: List[TicketRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+MOCK_RESPONSE = TicketResponse(
+    tags=["technical"],
+    priority="Medium",
+    suggested_action="Assign to technical support team for further investigation."
+)
+
 SYSTEM_PROMPT = """
-You are a support ticket triage assistant. 
+You are a support ticket triage assistant.
 Classify the incoming ticket text into tags (e.g., billing, technical, feature request, account) and assign a priority (Low, Medium, High, Urgent).
 Provide a concise suggested next action.
-Return JSON format.
+Return a JSON object with keys "tags" (list of strings), "priority" and "suggested_action".
+"""
+
+REPAIR_PROMPT = """
+Your previous reply could not be used ({error}).
+Reply again with only the JSON object, using keys "tags", "priority" and "suggested_action".
 """
 
+async def _complete(messages):
+    async with llm_slots:
+        response = await client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            response_format={ "type": "json_object" }
+        )
+    return response.choices[0].message.content
+
+async def call_llm(ticket_text):
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": ticket_text},
+    ]
+    content = await _complete(messages)
+    try:
+        result = parse_model(content, TicketResponse)
+        parse_stats.record("ok")
+        return result
+    except OutputParseError as e:
+        error = e
+
+    # One repair attempt: show the model its own output and what was wrong with it
+    messages += [
+        {"role": "assistant", "content": content or ""},
+        {"role": "user", "content": REPAIR_PROMPT.format(error=error)},
+    ]
+    content = await _complete(messages)
+    try:
+        result = parse_model(content, TicketResponse)
+    except OutputParseError:
+        parse_stats.record("failed")
+        raise
+    parse_stats.record("repaired")
+    return result
+
+async def classify_text(ticket_text):
+    if not os.getenv("OPENAI_API_KEY"):
+        # Mock response if key is missing for demonstration
+        return MOCK_RESPONSE
+
+    if not SHORTCUTS:
+        route_stats["llm"] += 1
+        return await _classify_with_llm(ticket_text)
+
+    cached, _ = await ticket_cache.get(ticket_text)
+    if cached is not None:
+        route_stats["cache"] += 1
+        return TicketResponse(**cached)
+
+    if fast_model is not None:
+        local = fast_model.classify(ticket_text)
+        if local is not None:
+            route_stats["fast_path"] += 1
+            return TicketResponse(**local)
+
+    # Low confidence (or no local model yet): escalate to the LLM
+    route_stats["llm"] += 1
+    return await llm_flights.do(normalise(ticket_text), lambda: _classify_with_llm(ticket_text))
+
+async def _classify_with_llm(ticket_text):
+    result = await asyncio.wait_for(call_llm(ticket_text), LLM_TIMEOUT_S)
+    if SHORTCUTS:
+        await ticket_cache.set(ticket_text, result.model_dump())
+    if LOG_LABELS:
+        # File append off the event loop so a slow disk never stalls other requests
+        await asyncio.to_thread(log_labelled, ticket_text, result.model_dump())
+    return result
+
+async def _cancel_on_disconnect(request, task):
+    # Stop paying for an upstream call nobody is waiting for
+    while not task.done():
+        if await request.is_disconnected():
+            task.cancel()
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
 @app.get("/")
 async def root():
     return {"message": "Support Ticket Classifier API is running"}
 
-@app.post("/classify", response_model=TicketResponse)
-async def classify_ticket(request: TicketRequest):
-    if not os.getenv("OPENAI_API_KEY"):
-         # Mock response if key is missing for demonstration
-         return TicketResponse(
-             tags=["technical"],
-             priority="Medium",
-             suggested_action="Assign to technical support team for further investigation."
-         )
+@app.get("/stats")
+async def stats():
+    total = sum(route_stats.values())
+    return {
+        "cache": ticket_cache.metrics(),
+        "routes": route_stats,
+        "parsing": parse_stats.metrics(),
+        "coalescing": llm_flights.metrics(),
+        "escalation_rate": route_stats["llm"] / total if total else 0.0,
+        "gateway": gateway_metrics(),
+    }
 
+@app.post("/classify", response_model=TicketResponse)
+async def classify_ticket(request: TicketRequest, http_request: Request):
+    task = asyncio.create_task(classify_text(request.ticket_text))
+    watcher = asyncio.create_task(_cancel_on_disconnect(http_request, task))
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": request.ticket_text},
-            ],
-            response_format={ "type": "json_object" }
-        )
-        return TicketResponse(**eval(response.choices[0].message.content))
+        return await task
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"LLM did not respond within {LLM_TIMEOUT_S}s")
+    except OutputParseError as e:
+        raise HTTPException(status_code=502, detail=f"LLM returned unusable output after one repair attempt: {e}")
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled() and watcher.result():
+            # Client went away; the response is never delivered
+            raise HTTPException(status_code=499, detail="Client closed request")
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        watcher.cancel()
+
+async def _batch_results(tickets):
+    """
+    Classify tickets concurrently but emit NDJSON lines strictly in input order.
+    A sliding window keeps at most 2x MAX_CONCURRENCY tasks alive for very large batches.
+    """
+    window = deque()
+    pending = iter(enumerate(tickets))
+    try:
+        while True:
+            while len(window) < MAX_CONCURRENCY * 2:
+                item = next(pending, None)
+                if item is None:
+                    break
+                index, ticket = item
+                window.append((index, asyncio.create_task(classify_text(ticket.ticket_text))))
+            if not window:
+                return
+
+            index, task = window.popleft()
+            try:
+                line = {"index": index, "result": (await task).model_dump()}
+            except asyncio.TimeoutError:
+                line = {"index": index, "error": f"LLM did not respond within {LLM_TIMEOUT_S}s"}
+            except Exception as e:
+                line = {"index": index, "error": str(e)}
+            yield json.dumps(line) + "\n"
+    finally:
+        # Client disconnected mid-stream: don't leave upstream calls running
+        for _, task in window:
+            task.cancel()
+
+@app.post("/classify/batch")
+async def classify_batch(request: BatchRequest):
+    """Bulk classification streamed back as NDJSON, one line per ticket in input order."""
+    return StreamingResponse(_batch_results(request.tickets), media_type="application/x-ndjson")
@@ -0,0 +1,57 @@
+"""
+Structured-output parsing for LLM classifications.
+Replaces eval() with a JSON parse (orjson when installed) plus Pydantic schema
+validation. Unknown fields are ignored, markdown code fences are stripped, and
+outcomes are counted so bad model output shows up as a metric.
+"""
+import re
+from pydantic import ValidationError
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    import json
+    _loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+class OutputParseError(ValueError):
+    """Model output was not valid JSON or did not match the response schema."""
+
+def parse_model(content, model):
+    """
+    Args:
+        content: raw message content from the LLM
+        model: Pydantic model class to validate against
+    Returns:
+        model instance
+    Raises:
+        OutputParseError
+    """
+    text = _FENCE.sub("", (content or "").strip())
+    try:
+        data = _loads(text)
+    except JSONDecodeError as e:
+        raise OutputParseError(f"invalid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise OutputParseError(f"expected a JSON object, got {type(data).__name__}")
+    try:
+        return model.model_validate(data)
+    except ValidationError as e:
+        raise OutputParseError(f"schema mismatch: {e.errors(include_url=False)}") from e
+
+class ParseStats:
+    """Counts of first-try successes, successful repairs and final failures."""
+
+    def __init__(self):
+        self.counts = {"ok": 0, "repaired": 0, "failed": 0}
+
+    def record(self, outcome):
+        self.counts[outcome] += 1
+
+    def metrics(self):
+        total = sum(self.counts.values())
+        return {**self.counts, "failure_rate": self.counts["failed"] / total if total else 0.0}
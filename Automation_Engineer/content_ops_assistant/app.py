@@ -1,8 +1,12 @@
 import streamlit as st
-from openai import OpenAI
 import os
+import io
+import csv
+import asyncio
 from dotenv import load_dotenv
 
+from generation import generate_channels, get_generation_cache, gateway_metrics, TONES, PERSONAS, CHANNELS
+
 load_dotenv()
 
 st.set_page_config(page_title="Content Ops Assistant", layout="wide")
@@ -12,9 +16,13 @@ st.markdown("Turn a campaign brief into multi-channel copy instantly.")
 
 with st.sidebar:
     st.header("🎛️ Brand Controls")
-    tone = st.select_slider("Tone of Voice", options=["Professional", "Friendly", "Bold", "Witty"])
-    persona = st.selectbox("Target Persona", ["SaaS Founders", "Marketing Managers", "DevOps Engineers"])
-    target_channel = st.multiselect("Channels", ["Email", "LinkedIn", "Facebook Ad"], default=["Email", "LinkedIn"])
+    tone = st.select_slider("Tone of Voice", options=TONES)
+    persona = st.selectbox("Target Persona", PERSONAS)
+    target_channel = st.multiselect("Channels", CHANNELS, default=["Email", "LinkedIn"])
+    use_cache = st.checkbox("Reuse cached copy", value=True,
+                            help="Identical brief / tone / persona / channel combinations are served from cache")
+    # Filled at the end of the run so the numbers include this run's generations
+    stats_panel = st.empty()
 
 brief = st.text_area("Campaign Brief", placeholder="Describe your product launch or offer here...", height=150)
 
@@ -22,23 +30,57 @@ if st.button("Generate Content"):
     if not brief:
         st.warning("Please enter a campaign brief.")
     else:
-        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-key-here"))
-        
+        placeholders = {}
+        for channel in target_channel:
+            st.subheader(f"📱 {channel}")
+            placeholders[channel] = st.empty()
+            placeholders[channel].caption("Waiting for first tokens...")
+            st.divider()
+
+        def show_tokens(channel, text):
+            placeholders[channel].markdown(text + " ▌")
+
         with st.spinner("Writing copy..."):
-            for channel in target_channel:
-                st.subheader(f"📱 {channel}")
-                
-                if not os.getenv("OPENAI_API_KEY"):
-                    # Mock response
-                    st.info(f"Generated {tone} {channel} content for {persona} based on: '{brief[:30]}...'")
-                else:
-                    prompt = f"Write a {tone} {channel} post for {persona} based on this brief: {brief}"
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[{"role": "user", "content": prompt}]
-                    )
-                    st.write(response.choices[0].message.content)
-                st.divider()
-
-if st.button("Export to CSV"):
-    st.success("Successfully prepared for export (CSV)!")
+            results, total_s = asyncio.run(generate_channels(brief, tone, persona, target_channel, show_tokens, use_cache))
+
+        for channel, result in results.items():
+            if "error" in result:
+                placeholders[channel].error(f"Generation failed: {result['error']}")
+            elif not os.getenv("OPENAI_API_KEY"):
+                placeholders[channel].info(result["text"])
+            else:
+                placeholders[channel].write(result["text"])
+
+        st.markdown("### ⏱️ Latency")
+        cols = st.columns(len(results) + 1)
+        for col, (channel, result) in zip(cols, results.items()):
+            if "error" not in result:
+                note = "⚡ cached" if result["cached"] else f"first token {result['ttft_s'] or 0:.2f}s"
+                col.metric(channel, f"{result['latency_s']:.2f}s", note, delta_color="off")
+        cols[-1].metric("Total (concurrent)", f"{total_s:.2f}s")
+
+        st.session_state["last_run"] = [
+            {"tone": tone, "persona": persona, "channel": channel, "brief": brief,
+             "text": result.get("text", ""), "latency_s": result.get("latency_s"), "error": result.get("error", "")}
+            for channel, result in results.items()
+        ]
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+if st.session_state.get("last_run"):
+    st.download_button("Export to CSV", to_csv(st.session_state["last_run"]),
+                       file_name="campaign_copy.csv", mime="text/csv")
+else:
+    st.button("Export to CSV", disabled=True, help="Generate content first")
+
+if os.getenv("OPENAI_API_KEY"):
+    with stats_panel.container():
+        stats = get_generation_cache().stats()
+        st.caption(f"Cache: {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        with st.expander("LLM gateway"):
+            st.json(gateway_metrics())
@@ -0,0 +1,215 @@
+"""
+Overnight bulk generation: briefs x tones x personas x channels.
+Briefs are read from CSV or JSONL (a `brief` column/field, optional `brief_id`).
+Jobs run through a bounded pool of async workers and every finished row is
+written to the output (CSV or Parquet) as it completes. Re-running the same
+command resumes: jobs already in the output / checkpoint are skipped.
+
+Without OPENAI_API_KEY the run is refused unless --mock is given. Mock rows are
+labelled model="mock" and never count as done, so a later run with a key
+generates the real copy (the latest row per job_id wins).
+
+Usage:
+  python batch_generate.py briefs.csv --out copy.csv --concurrency 16
+  python batch_generate.py briefs.jsonl --out copy.parquet --tones Bold Witty --channels Email
+  python batch_generate.py briefs.csv --out dry_run.csv --mock
+"""
+import os
+import csv
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import itertools
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+from generation import (stream_channel, get_generation_cache, async_openai_client, gateway_metrics,
+                        MODEL, TONES, PERSONAS, CHANNELS)
+
+load_dotenv()
+
+MOCK_MODEL = "mock"
+FIELDS = ["job_id", "brief_id", "tone", "persona", "channel", "model", "text", "latency_s", "ttft_s", "generated_at"]
+
+def load_briefs(path):
+    """[{"brief_id", "brief"}] from CSV or JSONL; brief_id defaults to a content hash."""
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()] if path.endswith((".jsonl", ".ndjson")) \
+            else list(csv.DictReader(f))
+    briefs = []
+    for row in rows:
+        brief = (row.get("brief") or "").strip()
+        if brief:
+            brief_id = str(row.get("brief_id") or hashlib.sha256(brief.encode("utf-8")).hexdigest()[:12])
+            briefs.append({"brief_id": brief_id, "brief": brief})
+    return briefs
+
+def expand_jobs(briefs, tones, personas, channels):
+    for b, tone, persona, channel in itertools.product(briefs, tones, personas, channels):
+        yield {"job_id": f"{b['brief_id']}|{tone}|{persona}|{channel}", "brief_id": b["brief_id"],
+               "brief": b["brief"], "tone": tone, "persona": persona, "channel": channel}
+
+class CsvSink:
+    """Appends rows as they complete; the CSV itself is the checkpoint."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def done_ids(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return {row["job_id"] for row in csv.DictReader(f) if row["model"] != MOCK_MODEL}
+
+    def __enter__(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=FIELDS)
+        if new:
+            self._writer.writeheader()
+        return self
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self._file.flush()
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+class ParquetSink:
+    """
+    Parquet can't be appended to, so finished rows also go to a JSONL checkpoint.
+    Each run rewrites the Parquet file from the checkpoint, then streams new rows
+    in row groups of `row_group_size`.
+    """
+
+    def __init__(self, path, row_group_size=500):
+        self.path = path
+        self.checkpoint = path + ".checkpoint.jsonl"
+        self.row_group_size = row_group_size
+
+    def _checkpointed(self):
+        if not os.path.exists(self.checkpoint):
+            return []
+        with open(self.checkpoint, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def done_ids(self):
+        return {row["job_id"] for row in self._checkpointed() if row["model"] != MOCK_MODEL}
+
+    def __enter__(self):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.float64() if name in ("latency_s", "ttft_s") else pa.string())
+                                  for name in FIELDS])
+        self._writer = pq.ParquetWriter(self.path, self._schema)
+        self._buffer = self._checkpointed()
+        self._flush()
+        self._checkpoint_file = open(self.checkpoint, "a", encoding="utf-8")
+        return self
+
+    def _flush(self):
+        if self._buffer:
+            self._writer.write_table(self._pa.Table.from_pylist(self._buffer, schema=self._schema))
+            self._buffer = []
+
+    def write(self, row):
+        self._checkpoint_file.write(json.dumps(row) + "\n")
+        self._checkpoint_file.flush()
+        self._buffer.append(row)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def __exit__(self, *exc):
+        self._flush()
+        self._writer.close()
+        self._checkpoint_file.close()
+
+def make_sink(path):
+    return ParquetSink(path) if path.endswith(".parquet") else CsvSink(path)
+
+async def run_batch(jobs, sink, concurrency=16, progress_every=50, cache=None, mock=False):
+    """Bounded worker pool; returns stats. `mock` writes placeholder copy without calling the LLM."""
+    queue = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {"done": 0, "failed": 0}
+    start = time.perf_counter()
+
+    async def worker(client):
+        while True:
+            job = await queue.get()
+            if job is None:
+                return
+            try:
+                result = await stream_channel(client, job["brief"], job["tone"], job["persona"], job["channel"],
+                                              cache=cache)
+            except Exception as e:
+                # Not written, so a rerun retries it
+                stats["failed"] += 1
+                print(f"⚠️ {job['job_id']}: {e}")
+                continue
+            sink.write({**{k: job[k] for k in ("job_id", "brief_id", "tone", "persona", "channel")},
+                        "model": MOCK_MODEL if client is None else MODEL, "text": result["text"], "latency_s": result["latency_s"],
+                        "ttft_s": result["ttft_s"], "generated_at": datetime.now(timezone.utc).isoformat()})
+            stats["done"] += 1
+            if stats["done"] % progress_every == 0:
+                print(f"  {stats['done']} done ({stats['done'] / (time.perf_counter() - start):.1f} jobs/s)")
+
+    async def run(client):
+        workers = [asyncio.create_task(worker(client)) for _ in range(concurrency)]
+        for job in jobs:
+            await queue.put(job)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    if mock:
+        await run(None)
+    else:
+        async with async_openai_client("content-ops") as client:
+            await run(client)
+    stats["elapsed_s"] = time.perf_counter() - start
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate copy for every brief x tone x persona x channel.")
+    parser.add_argument("briefs", help="CSV or JSONL file with a `brief` column")
+    parser.add_argument("--out", default="generated_copy.csv", help=".csv or .parquet")
+    parser.add_argument("--tones", nargs="+", default=TONES)
+    parser.add_argument("--personas", nargs="+", default=PERSONAS)
+    parser.add_argument("--channels", nargs="+", default=CHANNELS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--no-cache", action="store_true", help="always regenerate, ignoring cached copy")
+    parser.add_argument("--mock", action="store_true",
+                        help="write placeholder copy without calling the LLM (never counted as done)")
+    args = parser.parse_args()
+    if not args.mock and not os.getenv("OPENAI_API_KEY"):
+        parser.error("OPENAI_API_KEY is not set; pass --mock for a dry run with placeholder copy")
+
+    briefs = load_briefs(args.briefs)
+    sink = make_sink(args.out)
+    done = sink.done_ids()
+    jobs = [job for job in expand_jobs(briefs, args.tones, args.personas, args.channels) if job["job_id"] not in done]
+    total = len(briefs) * len(args.tones) * len(args.personas) * len(args.channels)
+    print(f"📝 {len(briefs)} briefs → {total} jobs ({len(done)} already done, {len(jobs)} to run)")
+
+    with sink:
+        cache = None if args.no_cache else get_generation_cache()
+        stats = asyncio.run(run_batch(jobs, sink, args.concurrency, cache=cache, mock=args.mock))
+    rate = stats["done"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    print(f"✅ {stats['done']} generated, {stats['failed']} failed in {stats['elapsed_s']:.1f}s "
+          f"({rate:.1f} jobs/s) → {args.out}")
+    if cache is not None and not args.mock:
+        cache_stats = cache.stats()
+        print(f"⚡ Generation cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate']:.1%} hit rate)")
+    llm = gateway_metrics()["callers"].get("content-ops")
+    if llm:
+        print(f"🌐 Gateway: {llm['requests']} LLM calls, p50 {llm['p50_ms']} ms / p95 {llm['p95_ms']} ms, "
+              f"{llm['retries']} retries, {llm['errors']} errors, "
+              f"{llm['prompt_tokens'] + llm['completion_tokens']} tokens")
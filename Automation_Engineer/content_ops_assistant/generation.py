@@ -0,0 +1,127 @@
+"""
+Multi-channel copy generation shared by the Streamlit app.
+All selected channels are generated concurrently with streaming AsyncOpenAI
+calls; each channel's tokens are pushed to a callback as they arrive, and
+per-channel latency / time-to-first-token are returned with the text.
+
+Prompts put the brief in a system message that is identical for every tone,
+persona and channel, so it forms a stable prefix that upstream prompt caching
+can reuse; only the short user instruction varies. Finished copy is cached on
+disk per (brief hash, tone, persona, channel, model, prompt hash), so editing
+the prompt templates stops serving copy written for the old wording.
+
+Upstream calls go through the shared llm_gateway (pooled connections, global
+rate / concurrency limits, retries, per-caller metrics under "content-ops").
+"""
+import os
+import time
+import asyncio
+import hashlib
+import threading
+
+from generation_cache import GenerationCache, cache_key
+
+from llm_gateway import async_openai_client, metrics as gateway_metrics
+
+MODEL = "gpt-3.5-turbo"
+TONES = ["Professional", "Friendly", "Bold", "Witty"]
+PERSONAS = ["SaaS Founders", "Marketing Managers", "DevOps Engineers"]
+CHANNELS = ["Email", "LinkedIn", "Facebook Ad"]
+
+SYSTEM_PREFIX = """You are a senior marketing copywriter. Write channel-ready copy for the campaign brief below.
+Follow the requested tone, persona and channel exactly and return only the copy.
+
+Campaign brief:
+{brief}"""
+USER_INSTRUCTION = "Write a {tone} {channel} post for {persona}."
+PROMPT_HASH = hashlib.sha256(f"{SYSTEM_PREFIX}\0{USER_INSTRUCTION}".encode("utf-8")).hexdigest()[:16]
+
+def build_messages(brief, tone, persona, channel):
+    # Brief first and unchanged across variants; the varying part comes last
+    return [
+        {"role": "system", "content": SYSTEM_PREFIX.format(brief=brief.strip())},
+        {"role": "user", "content": USER_INSTRUCTION.format(tone=tone, channel=channel, persona=persona)},
+    ]
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_generation_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache()
+        return _cache
+
+def mock_copy(brief, tone, persona, channel):
+    return f"Generated {tone} {channel} content for {persona} based on: '{brief[:30]}...'"
+
+async def stream_channel(client, brief, tone, persona, channel, on_token=None, cache=None):
+    """
+    Args:
+        client: AsyncOpenAI client, or None for mock mode
+        on_token: optional callback(channel, text_so_far) called per streamed chunk
+        cache: optional GenerationCache (real generations only; mock output is never cached)
+    Returns:
+        {"text", "latency_s", "ttft_s", "cached"}
+    """
+    start = time.perf_counter()
+    ttft = None
+    text = ""
+    key = cache_key(brief, tone, persona, channel, MODEL, PROMPT_HASH)
+    if client is not None and cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            if on_token:
+                on_token(channel, cached)
+            elapsed = time.perf_counter() - start
+            return {"text": cached, "latency_s": elapsed, "ttft_s": elapsed, "cached": True}
+
+    if client is None:
+        text = mock_copy(brief, tone, persona, channel)
+        ttft = time.perf_counter() - start
+        if on_token:
+            on_token(channel, text)
+    else:
+        stream = await client.chat.completions.create(
+            model=MODEL,
+            messages=build_messages(brief, tone, persona, channel),
+            stream=True,
+            # Final chunk carries token usage for the gateway's per-caller metrics
+            stream_options={"include_usage": True},
+        )
+        # Close the response even if on_token raises, so the gateway slot is returned
+        async with stream:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                text += delta
+                if on_token:
+                    on_token(channel, text)
+        if cache is not None and text:
+            cache.set(key, text)
+    return {"text": text, "latency_s": time.perf_counter() - start, "ttft_s": ttft, "cached": False}
+
+async def generate_channels(brief, tone, persona, channels, on_token=None, use_cache=True):
+    """
+    Generate every channel concurrently.
+
+    Returns:
+        ({channel: result or {"error": message}}, total_s)
+    """
+    start = time.perf_counter()
+    if not os.getenv("OPENAI_API_KEY"):
+        results = await asyncio.gather(*(stream_channel(None, brief, tone, persona, c, on_token) for c in channels),
+                                       return_exceptions=True)
+    else:
+        # A fresh client per run (Streamlit reruns get a new event loop); the connection pool is the gateway's
+        async with async_openai_client("content-ops") as client:
+            cache = get_generation_cache() if use_cache else None
+            results = await asyncio.gather(*(stream_channel(client, brief, tone, persona, c, on_token, cache)
+                                             for c in channels), return_exceptions=True)
+    # One failed channel shouldn't discard the others
+    results = [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+    return dict(zip(channels, results)), time.perf_counter() - start
@@ -0,0 +1,72 @@
+"""
+On-disk cache of generated copy.
+Keyed by (sha256 of the brief, tone, persona, channel, model, prompt hash), so
+rerunning an unchanged combination, e.g. after moving only the tone slider and
+back, is served instantly instead of regenerated, while a prompt edit misses. Bounded by entry count with LRU eviction.
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+CACHE_PATH = os.getenv("GENERATION_CACHE_PATH", "generation_cache.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_generations_last_used ON generations(last_used);
+"""
+
+def brief_hash(brief):
+    return hashlib.sha256(brief.strip().encode("utf-8")).hexdigest()
+
+def cache_key(brief, tone, persona, channel, model, prompt_hash):
+    return "\0".join([brief_hash(brief), tone, persona, channel, model, prompt_hash])
+
+class GenerationCache:
+
+    def __init__(self, path=CACHE_PATH, max_entries=50_000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Counted once here and kept up to date on insert/evict, instead of a COUNT(*) scan per write
+        (self._entries,) = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM generations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE generations SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def set(self, key, text):
+        with self._lock:
+            # Only a new key adds a row; replacing an existing one (primary-key lookup) does not
+            existed = self._conn.execute("SELECT 1 FROM generations WHERE key = ?", (key,)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO generations (key, text, last_used) VALUES (?, ?, ?)",
+                               (key, text, time.time()))
+            if existed is None:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM generations WHERE key IN "
+                    "(SELECT key FROM generations ORDER BY last_used LIMIT ?)", (self._entries - self.max_entries,))
+                self._entries -= cursor.rowcount
+            self._conn.commit()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0,
+                "entries": self._entries}
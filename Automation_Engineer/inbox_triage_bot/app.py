@@ -1,6 +1,6 @@
 import streamlit as st
 import os
-from triage_bot import triage_email
+from triage_bot import triage_email, triage_thread, get_thread_store, llm_flights, prefilter, gateway_metrics
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,6 +16,18 @@ Automatically classify and route incoming emails to the right department.
 if not os.getenv("OPENAI_API_KEY"):
     st.sidebar.warning("⚠️ OpenAI API Key not found. Running in DEMO mode.")
 
+with st.sidebar.expander("LLM request coalescing"):
+    st.json(llm_flights.metrics())
+with st.sidebar.expander("Rule pre-filter"):
+    st.json(prefilter.metrics())
+with st.sidebar.expander("LLM gateway"):
+    st.json(gateway_metrics())
+
+thread_aware = st.sidebar.checkbox("Thread-aware triage", help="Strip quoted history and reuse the earlier triage of the thread (matched by subject when pasted)")
+if thread_aware:
+    with st.sidebar.expander("Thread token savings"):
+        st.json(get_thread_store().metrics())
+
 email_text = st.text_area("Paste the email body below:", height=200, placeholder="e.g., Hi, I want to buy your enterprise plan...")
 
 if st.button("Triage Email"):
@@ -23,7 +35,7 @@ if st.button("Triage Email"):
         st.warning("Please paste an email.")
     else:
         with st.spinner("Analyzing email..."):
-            result = triage_email(email_text)
+            result = triage_thread(email_text) if thread_aware else triage_email(email_text)
             
             col1, col2, col3 = st.columns(3)
             
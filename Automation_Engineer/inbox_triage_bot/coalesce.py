@@ -0,0 +1,47 @@
+"""
+Single-flight coalescing for worker threads: concurrent callers with the same
+key share one in-flight upstream call and all receive its result (or its
+exception). Thread-based counterpart of Applied_AI/ticket_classifier/coalesce.py.
+"""
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """Thread-safe single-flight group with leader / coalesced counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future of the leader's call
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """
+        Args:
+            key: coalescing key (e.g. normalised input text)
+            fn: zero-argument callable; only called by the first caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    def metrics(self):
+        with self._lock:
+            total = self.stats["leaders"] + self.stats["coalesced"]
+            return {**self.stats, "in_flight": len(self._calls),
+                    "coalesced_rate": self.stats["coalesced"] / total if total else 0.0}
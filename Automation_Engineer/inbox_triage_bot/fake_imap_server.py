@@ -0,0 +1,117 @@
+"""
+Minimal local IMAP4rev1 stand-in for testing the mailbox worker.
+Serves a read-only INBOX from an mbox file (or synthetic messages) and supports
+just what imaplib + mailbox_worker use: CAPABILITY, LOGIN, SELECT, UID SEARCH ALL,
+UID FETCH with BODY.PEEK[] / BODY.PEEK[HEADER.FIELDS (...)], NOOP, LOGOUT.
+Any username/password is accepted.
+
+Run: python fake_imap_server.py --port 1143 --count 500
+"""
+import re
+import mailbox
+import argparse
+import threading
+import socketserver
+
+from sample_inbox import generate_messages
+
+_UID_FETCH = re.compile(r"UID FETCH (\S+) \((.*)\)$", re.IGNORECASE)
+
+def parse_uid_set(spec, max_uid):
+    """'1:5,8,10:*' -> set of ints."""
+    uids = set()
+    for part in spec.split(","):
+        if ":" in part:
+            lo, hi = part.split(":")
+            lo = max_uid if lo == "*" else int(lo)
+            hi = max_uid if hi == "*" else int(hi)
+            uids.update(range(min(lo, hi), max(lo, hi) + 1))
+        else:
+            uids.add(max_uid if part == "*" else int(part))
+    return uids
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+
+    def send(self, line):
+        if isinstance(line, str):
+            line = line.encode("utf-8") + b"\r\n"
+        self.wfile.write(line)
+
+    def handle(self):
+        messages = self.server.messages
+        self.send("* OK [CAPABILITY IMAP4rev1] fake IMAP server ready")
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            tag, _, rest = raw.decode("utf-8").strip().partition(" ")
+            command = rest.split(" ", 1)[0].upper()
+
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1")
+                self.send(f"{tag} OK CAPABILITY completed")
+            elif command == "LOGIN":
+                self.send(f"{tag} OK LOGIN completed")
+            elif command in ("SELECT", "EXAMINE"):
+                self.send(f"* {len(messages)} EXISTS")
+                self.send("* 0 RECENT")
+                self.send("* OK [UIDVALIDITY 1] UIDs valid")
+                self.send(f"{tag} OK [READ-ONLY] {command} completed")
+            elif command == "UID" and rest.upper().startswith("UID SEARCH"):
+                self.send("* SEARCH " + " ".join(str(uid) for uid in range(1, len(messages) + 1)))
+                self.send(f"{tag} OK SEARCH completed")
+            elif command == "UID" and _UID_FETCH.match(rest):
+                spec, items = _UID_FETCH.match(rest).groups()
+                self.fetch(tag, spec, items)
+            elif command == "NOOP":
+                self.send(f"{tag} OK NOOP completed")
+            elif command == "LOGOUT":
+                self.send("* BYE logging out")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self.send(f"{tag} BAD unsupported command")
+
+    def fetch(self, tag, spec, items):
+        messages = self.server.messages
+        fields = re.search(r"HEADER\.FIELDS \(([^)]*)\)", items, re.IGNORECASE)
+        for uid in sorted(parse_uid_set(spec, len(messages))):
+            if not 1 <= uid <= len(messages):
+                continue
+            msg = messages[uid - 1]
+            if fields:
+                wanted = fields.group(1).split()
+                section = f"BODY[HEADER.FIELDS ({fields.group(1).upper()})]"
+                data = "".join(f"{name}: {msg[name]}\r\n" for name in wanted if msg[name] is not None) + "\r\n"
+                data = data.encode("utf-8")
+            else:
+                section = "BODY[]"
+                data = msg.as_bytes().replace(b"\r\n", b"\n").replace(b"\n", b"\r\n")
+            self.send(f"* {uid} FETCH (UID {uid} {section} {{{len(data)}}}".encode("utf-8") + b"\r\n" + data + b")\r\n")
+        self.send(f"{tag} OK FETCH completed")
+
+class FakeIMAPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, messages):
+        super().__init__(address, IMAPHandler)
+        self.messages = list(messages)
+
+def serve_in_background(messages, host="127.0.0.1", port=0):
+    """Start a server on a daemon thread; returns (server, port)."""
+    server = FakeIMAPServer((host, port), messages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve an mbox (or synthetic mail) over a fake IMAP server.")
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--mbox", help="mbox file to serve; synthetic messages otherwise")
+    parser.add_argument("--count", type=int, default=500)
+    args = parser.parse_args()
+
+    messages = list(mailbox.mbox(args.mbox)) if args.mbox else generate_messages(args.count)
+    server = FakeIMAPServer(("127.0.0.1", args.port), messages)
+    print(f"📬 Fake IMAP server on 127.0.0.1:{args.port} with {len(messages)} messages")
+    server.serve_forever()
@@ -0,0 +1,232 @@
+"""
+Bulk triage worker for a shared inbox.
+Reads messages from a Maildir, an mbox file or an IMAP folder, triages them on a
+bounded thread pool and writes routing decisions to SQLite in batches. The
+decisions table doubles as the checkpoint: messages whose Message-ID is already
+stored are skipped on restart (for IMAP, before their bodies are downloaded).
+
+Usage:
+  python mailbox_worker.py --mbox sample.mbox --workers 8
+  python mailbox_worker.py --maildir ~/Maildir/ops
+  python mailbox_worker.py --imap 127.0.0.1:1143 --user ops --password secret
+  python mailbox_worker.py --mbox threads.mbox --threads
+"""
+import os
+import re
+import time
+import email
+import sqlite3
+import hashlib
+import imaplib
+import mailbox
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+
+from triage_bot import triage_email, triage_thread, get_thread_store, prefilter, gateway_metrics
+
+DB_PATH = os.getenv("TRIAGE_DB_PATH", "triage_decisions.sqlite")
+MAX_BODY_CHARS = 4000
+
+def message_id(msg):
+    """Message-ID header, or a content hash for messages without one."""
+    mid = (msg.get("Message-ID") or "").strip()
+    return mid or "<sha256:" + hashlib.sha256(msg.as_bytes()).hexdigest() + ">"
+
+def plain_text(msg):
+    """First text/plain part (falling back to tag-stripped text/html), decoded."""
+    html = None
+    for part in msg.walk():
+        if part.is_multipart() or part.get_content_disposition() == "attachment":
+            continue
+        payload = part.get_payload(decode=True)
+        if payload is None:
+            continue
+        text = payload.decode(part.get_content_charset() or "utf-8", errors="replace")
+        if part.get_content_type() == "text/plain":
+            return text
+        if part.get_content_type() == "text/html" and html is None:
+            html = re.sub(r"<[^>]+>", " ", text)
+    return html or ""
+
+def email_text(msg):
+    """What triage_email sees: sender, subject and (truncated) body."""
+    return f"From: {msg.get('From', '')}\nSubject: {msg.get('Subject', '')}\n\n{plain_text(msg)[:MAX_BODY_CHARS]}"
+
+def iter_local(path):
+    """Messages from a Maildir directory or an mbox file."""
+    box = mailbox.Maildir(path, factory=None, create=False) if os.path.isdir(path) else mailbox.mbox(path)
+    try:
+        yield from box
+    finally:
+        box.close()
+
+def _fetched(data):
+    """(uid, payload) pairs from an imaplib UID FETCH response."""
+    for item in data:
+        if isinstance(item, tuple):
+            yield re.search(rb"UID (\d+)", item[0]).group(1), item[1]
+
+def iter_imap(host, port, user, password, folder="INBOX", use_ssl=False, done=frozenset(), chunk=100):
+    """
+    Messages from an IMAP folder, fetched in UID chunks. A cheap Message-ID header
+    pass runs first so already-triaged messages are never downloaded.
+    """
+    conn = imaplib.IMAP4_SSL(host, port) if use_ssl else imaplib.IMAP4(host, port)
+    try:
+        conn.login(user, password)
+        conn.select(folder, readonly=True)
+        _, data = conn.uid("SEARCH", None, "ALL")
+        uids = data[0].split()
+        for i in range(0, len(uids), chunk):
+            batch = b",".join(uids[i:i + chunk]).decode()
+            _, data = conn.uid("FETCH", batch, "(BODY.PEEK[HEADER.FIELDS (MESSAGE-ID)])")
+            todo = [uid for uid, header in _fetched(data)
+                    if (email.message_from_bytes(header).get("Message-ID") or "").strip() not in done]
+            if not todo:
+                continue
+            _, data = conn.uid("FETCH", b",".join(todo).decode(), "(BODY.PEEK[])")
+            for _, raw in _fetched(data):
+                yield email.message_from_bytes(raw)
+    finally:
+        conn.logout()
+
+class DecisionStore:
+    """Routing decisions in SQLite, buffered and written with executemany."""
+
+    def __init__(self, path=DB_PATH, flush_every=100):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS decisions (
+                message_id TEXT PRIMARY KEY, sender TEXT, subject TEXT,
+                category TEXT, priority TEXT, route_to TEXT, summary TEXT, triaged_at REAL
+            )""")
+        self.flush_every = flush_every
+        self._pending = []
+
+    def done_ids(self):
+        return {row[0] for row in self.conn.execute("SELECT message_id FROM decisions")}
+
+    def add(self, message_id, sender, subject, triage):
+        self._pending.append((message_id, sender, subject, triage.category, triage.priority,
+                              triage.route_to, triage.summary, time.time()))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+def run_worker(messages, store, workers=8, triage=triage_email, done=None):
+    """
+    Triage messages with at most `workers` calls in flight (and 2x that queued),
+    skipping Message-IDs already in the store.
+
+    Returns:
+        stats dict
+    """
+    done = store.done_ids() if done is None else done
+    stats = {"seen": 0, "skipped": 0, "triaged": 0, "failed": 0, "routes": Counter()}
+    in_flight = {}
+
+    def drain(return_when):
+        finished, _ = wait(in_flight, return_when=return_when)
+        for future in finished:
+            mid, sender, subject = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # Not checkpointed, so the next run retries it
+                stats["failed"] += 1
+                print(f"⚠️ {mid}: {e}")
+                continue
+            store.add(mid, sender, subject, result)
+            stats["triaged"] += 1
+            stats["routes"][result.route_to] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for msg in messages:
+                stats["seen"] += 1
+                mid = message_id(msg)
+                if mid in done:
+                    stats["skipped"] += 1
+                    continue
+                done.add(mid)
+                while len(in_flight) >= workers * 2:
+                    drain(FIRST_COMPLETED)
+                future = executor.submit(triage, email_text(msg), msg)
+                in_flight[future] = (mid, msg.get("From", ""), msg.get("Subject", ""))
+            if in_flight:
+                drain(ALL_COMPLETED)
+        finally:
+            # Keep whatever finished, even when interrupted
+            store.flush()
+    stats["elapsed_s"] = time.perf_counter() - start
+    return stats
+
+def print_report(stats):
+    rate = stats["triaged"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    print(f"📬 Seen {stats['seen']} | skipped (checkpointed) {stats['skipped']} | "
+          f"triaged {stats['triaged']} | failed {stats['failed']}")
+    print(f"⏱️ {stats['elapsed_s']:.2f}s ({rate:.1f} msg/s)")
+    for route, count in stats["routes"].most_common():
+        print(f"  → {route}: {count}")
+    pre = prefilter.metrics()
+    saved = "n/a (no LLM calls timed)" if pre["llm_time_saved_s"] is None else f"{pre['llm_time_saved_s']:.1f}s of LLM time"
+    print(f"🧹 Pre-filter: {pre['short_circuited']}/{pre['total']} short-circuited ({pre['short_circuit_rate']:.1%}), "
+          f"{pre['mean_prefilter_us']:.0f} µs/msg, saved {saved}")
+    for rule, count in sorted(pre["by_rule"].items(), key=lambda r: -r[1]):
+        print(f"  ✂️ {rule}: {count}")
+    llm = gateway_metrics()["callers"].get("inbox-triage")
+    if llm:
+        print(f"🌐 Gateway: {llm['requests']} LLM calls, p50 {llm['p50_ms']} ms / p95 {llm['p95_ms']} ms, "
+              f"{llm['retries']} retries, {llm['errors']} errors, "
+              f"{llm['prompt_tokens'] + llm['completion_tokens']} tokens")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Triage a whole mailbox into routing decisions.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--maildir")
+    source.add_argument("--mbox")
+    source.add_argument("--imap", help="host:port")
+    parser.add_argument("--user", default=os.getenv("IMAP_USER", ""))
+    parser.add_argument("--password", default=os.getenv("IMAP_PASSWORD", ""))
+    parser.add_argument("--folder", default="INBOX")
+    parser.add_argument("--ssl", action="store_true")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--flush-every", type=int, default=100)
+    parser.add_argument("--threads", action="store_true",
+                        help="thread-aware triage: strip quoted history and reuse earlier triage of the thread")
+    args = parser.parse_args()
+
+    store = DecisionStore(args.db, flush_every=args.flush_every)
+    done = store.done_ids()
+    print(f"📌 Checkpoint: {len(done)} messages already triaged in {args.db}")
+    if args.imap:
+        host, _, port = args.imap.partition(":")
+        messages = iter_imap(host, int(port or (993 if args.ssl else 143)), args.user, args.password,
+                             args.folder, args.ssl, done=frozenset(done))
+    else:
+        messages = iter_local(args.maildir or args.mbox)
+    try:
+        triage = triage_thread if args.threads else triage_email
+        print_report(run_worker(messages, store, workers=args.workers, triage=triage, done=done))
+        if args.threads:
+            threads = get_thread_store().metrics()
+            print(f"🧵 Threads: {threads['new_threads']} new, {threads['thread_updates']} incremental updates, "
+                  f"{threads['repeats']} repeats, {threads['unthreaded']} unthreaded, "
+                  f"{threads['out_of_order']} late replies kept out of state | "
+                  f"tokens sent {threads['sent_tokens']} of {threads['full_tokens']} "
+                  f"({threads['token_savings_rate']:.1%} saved)")
+    finally:
+        store.close()
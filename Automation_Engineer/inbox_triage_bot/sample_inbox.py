@@ -0,0 +1,142 @@
+"""
+Synthetic shared-inbox generator for exercising the mailbox worker.
+Writes realistic sales / support / partnership / spam / newsletter / auto-reply
+messages, and optionally quoted reply chains, to an mbox file or a Maildir.
+
+Usage: python sample_inbox.py --count 500 --mbox sample.mbox
+       python sample_inbox.py --count 100 --threads 40 --mbox threads.mbox
+       python sample_inbox.py --count 500 --maildir sample_maildir
+"""
+import random
+import argparse
+import mailbox
+from email.message import EmailMessage
+from email.utils import format_datetime, make_msgid
+from datetime import datetime, timedelta, timezone
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+NAMES = ["John", "Priya", "Mei", "Carlos", "Fatima", "Olu", "Sven", "Ana"]
+
+TEMPLATES = {
+    "sales": [
+        ("Enterprise plan for {n} users", "Hi team, I'm interested in your enterprise plan for {n} users. Can we hop on a call this week? - {name} from {company}"),
+        ("Pricing question", "Hello, could you send over pricing for {n} seats and whether you offer annual billing? Thanks, {name} ({company})"),
+    ],
+    "support": [
+        ("Export failing", "Hi, since yesterday's update the export button returns a 500 error for our whole team ({company}). Please help. {name}"),
+        ("Cannot log in", "I can't log into my account and the password reset email never arrives. This is blocking {n} people at {company}. - {name}"),
+    ],
+    "partnerships": [
+        ("Integration partnership", "Hi, I lead partnerships at {company}. We'd love to explore a joint integration with your platform. Open to a chat? {name}"),
+    ],
+    "spam": [
+        ("You have WON ${n},000!!!", "Congratulations!!! You have been selected to receive ${n},000. Click here to claim your prize now. Limited time offer!"),
+        ("Cheap meds no prescription", "Best prices on meds, no prescription needed, 100% guaranteed, click the link to order now."),
+    ],
+    "newsletter": [
+        ("{company} Weekly: product updates", "This week at {company}: new dashboards, faster exports and a webinar on Thursday. Read more on our blog. Unsubscribe at any time."),
+    ],
+    "auto_reply": [
+        ("Out of Office: Re: your message", "I am currently out of the office with limited access to email and will respond when I return. - {name}"),
+    ],
+}
+WEIGHTS = {"sales": 0.25, "support": 0.3, "partnerships": 0.1, "spam": 0.15, "newsletter": 0.12, "auto_reply": 0.08}
+
+def make_message(kind, rng, when):
+    subject, body = rng.choice(TEMPLATES[kind])
+    fields = {"n": rng.randint(2, 500), "name": rng.choice(NAMES), "company": rng.choice(COMPANIES)}
+    domain = fields["company"].lower().replace(" ", "") + ".com"
+
+    msg = EmailMessage()
+    msg["Message-ID"] = make_msgid(domain=domain)
+    msg["Date"] = format_datetime(when)
+    msg["To"] = "ops@example.com"
+    msg["Subject"] = subject.format(**fields)
+    if kind == "spam":
+        msg["From"] = f"winner-{rng.randint(1000, 9999)}@promo-{rng.randint(10, 99)}.biz"
+    elif kind == "newsletter":
+        msg["From"] = f"news@{domain}"
+        msg["List-Unsubscribe"] = f"<mailto:unsubscribe@{domain}>"
+        msg["Precedence"] = "bulk"
+    elif kind == "auto_reply":
+        msg["From"] = f"{fields['name'].lower()}@{domain}"
+        msg["Auto-Submitted"] = "auto-replied"
+    else:
+        msg["From"] = f"{fields['name']} <{fields['name'].lower()}@{domain}>"
+    msg.set_content(body.format(**fields))
+    return msg
+
+REPLIES = [
+    "Thanks for the quick reply. Could you also confirm the onboarding timeline?",
+    "Following up on this: we still see the issue after clearing the cache.",
+    "Adding my colleague in cc. Tuesday 3pm works for us.",
+    "Great, please send the contract and we'll get it signed this week.",
+]
+
+def make_thread(rng, when, length):
+    """A reply chain where every reply quotes the full history below it."""
+    root = make_message(rng.choice(["sales", "support", "partnerships"]), rng, when)
+    thread, refs, history = [root], [root["Message-ID"]], root.get_content()
+    for i in range(1, length):
+        sender = rng.choice(NAMES)
+        reply = EmailMessage()
+        reply["Message-ID"] = make_msgid(domain="example.com")
+        reply["Date"] = format_datetime(when + timedelta(hours=i))
+        reply["From"] = f"{sender} <{sender.lower()}@example.com>"
+        reply["To"] = "ops@example.com"
+        reply["Subject"] = "Re: " + root["Subject"]
+        reply["In-Reply-To"] = refs[-1]
+        reply["References"] = " ".join(refs)
+        quoted = "\n".join("> " + line for line in history.splitlines())
+        body = f"{rng.choice(REPLIES)}\n\nOn {format_datetime(when)}, {thread[-1]['From']} wrote:\n{quoted}\n"
+        reply.set_content(body)
+        thread.append(reply)
+        refs.append(reply["Message-ID"])
+        history = body
+    return thread
+
+def generate_messages(count, seed=0, threads=0, thread_length=5):
+    """`count` standalone messages plus `threads` reply chains of `thread_length` messages."""
+    rng = random.Random(seed)
+    kinds, weights = zip(*WEIGHTS.items())
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    messages = [make_message(rng.choices(kinds, weights)[0], rng, start + timedelta(minutes=i)) for i in range(count)]
+    for i in range(threads):
+        messages.extend(make_thread(rng, start + timedelta(days=i), thread_length))
+    return messages
+
+def write_mbox(messages, path):
+    box = mailbox.mbox(path)
+    box.lock()
+    try:
+        for msg in messages:
+            box.add(msg)
+        box.flush()
+    finally:
+        box.unlock()
+        box.close()
+
+def write_maildir(messages, path):
+    box = mailbox.Maildir(path, create=True)
+    for msg in messages:
+        box.add(msg)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic shared inbox.")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=0, help="reply chains to add")
+    parser.add_argument("--thread-length", type=int, default=5)
+    parser.add_argument("--mbox")
+    parser.add_argument("--maildir")
+    args = parser.parse_args()
+
+    messages = generate_messages(args.count, args.seed, args.threads, args.thread_length)
+    if args.mbox:
+        write_mbox(messages, args.mbox)
+        print(f"✅ Wrote {len(messages)} messages to {args.mbox}")
+    if args.maildir:
+        write_maildir(messages, args.maildir)
+        print(f"✅ Wrote {len(messages)} messages to {args.maildir}")
+    if not (args.mbox or args.maildir):
+        parser.error("pass --mbox and/or --maildir")
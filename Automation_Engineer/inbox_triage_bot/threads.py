@@ -0,0 +1,228 @@
+"""
+Thread-aware triage state.
+Replies are reduced to their new text (quoted history stripped) and keyed to a
+thread by Message-ID / In-Reply-To / References, so earlier messages' triage and
+summary are reused instead of re-sending the whole chain to the LLM.
+
+Mail without any ids (e.g. pasted text) is only threaded by normalised subject
+together with its sender; an empty or generic subject, or no sender, means the
+message is triaged on its own and nothing is stored for it.
+
+Messages of one thread are triaged one at a time, but workers may reach them
+in any order. The thread state remembers the Date of the message it reflects,
+and an older reply arriving late never overwrites a newer state.
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from email.utils import parseaddr, parsedate_to_datetime
+
+THREAD_DB_PATH = os.getenv("THREAD_DB_PATH", "thread_state.sqlite")
+
+# Start of quoted history in common clients
+_QUOTE_HEADER = re.compile(
+    r"^(On .{0,200}wrote:\s*$|-{2,}\s*Original Message\s*-{2,}|From: .+\n(Sent|Date): .+)",
+    re.IGNORECASE | re.MULTILINE)
+_SUBJECT_PREFIX = re.compile(r"^\s*((re|fw|fwd|aw|sv)\s*:\s*)+", re.IGNORECASE)
+_MSGID = re.compile(r"<[^<>\s]+>")
+_PASTED_SUBJECT = re.compile(r"^Subject:[ \t]*(.*)$", re.IGNORECASE | re.MULTILINE)
+_PASTED_FROM = re.compile(r"^From:[ \t]*(.*)$", re.IGNORECASE | re.MULTILINE)
+# Subjects too common to say two messages belong together
+GENERIC_SUBJECTS = {"", "hi", "hello", "hey", "help", "question", "questions", "quick question", "urgent",
+                    "request", "issue", "problem", "support", "follow up", "follow-up", "update", "info",
+                    "information", "thanks", "thank you", "(no subject)", "no subject"}
+_HEADER_LINE = re.compile(r"[A-Za-z][A-Za-z-]*:[ \t].*")
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(text):
+        return len(_encoding.encode(text))
+except Exception:
+    # No tiktoken (or no cached BPE file offline): ~4 characters per token
+    def count_tokens(text):
+        return max(1, len(text) // 4)
+
+def _leading_headers_end(body):
+    """Offset just past a header block (From:/Sent:/Subject: ...) at the top of pasted or forwarded mail."""
+    offset = 0
+    for line in body.splitlines(keepends=True):
+        stripped = line.strip()
+        if not stripped and offset == 0:
+            offset += len(line)
+            continue
+        if not _HEADER_LINE.fullmatch(stripped):
+            break
+        offset += len(line)
+    return offset
+
+def strip_quoted(body):
+    """
+    New text of a reply: drops '>' lines and everything from the first quote
+    header on. A header block at the very top is the message's own header, not
+    a quote boundary, so the search starts after it.
+    """
+    match = _QUOTE_HEADER.search(body, _leading_headers_end(body))
+    if match:
+        body = body[:match.start()]
+    lines = [line for line in body.splitlines() if not line.lstrip().startswith(">")]
+    return "\n".join(lines).strip()
+
+def pasted_subject(text):
+    match = _PASTED_SUBJECT.search(text[:2000])
+    return match.group(1) if match else ""
+
+def pasted_sender(text):
+    match = _PASTED_FROM.search(text[:2000])
+    return match.group(1) if match else ""
+
+def thread_subject(subject):
+    return " ".join(_SUBJECT_PREFIX.sub("", subject or "").lower().split())
+
+def sender_address(sender):
+    """Lower-cased address of a From value ('Ann <ann@x.com>' -> 'ann@x.com'), or ''."""
+    return parseaddr(sender or "")[1].strip().lower()
+
+def message_time(headers):
+    """Unix time of the Date header, or None when absent or unparsable."""
+    try:
+        return parsedate_to_datetime(headers.get("Date")).timestamp()
+    except (AttributeError, TypeError, ValueError, IndexError):
+        return None
+
+def thread_refs(headers):
+    """(own Message-ID, [ancestor ids, oldest first]) from parsed headers."""
+    own = (headers.get("Message-ID") or "").strip()
+    ancestors = _MSGID.findall(headers.get("References") or "")
+    parent = (headers.get("In-Reply-To") or "").strip()
+    if parent and parent not in ancestors:
+        ancestors.append(parent)
+    return own, ancestors
+
+class ThreadStore:
+    """SQLite map of message -> thread and thread -> latest triage fields."""
+
+    def __init__(self, path=THREAD_DB_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                message_id TEXT PRIMARY KEY, thread_id TEXT,
+                category TEXT, priority TEXT, route_to TEXT, summary TEXT
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY, category TEXT, priority TEXT,
+                route_to TEXT, summary TEXT, updated_at REAL, message_at REAL
+            )""")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(threads)")}
+        if "message_at" not in columns:
+            # Stores created before out-of-order protection
+            self.conn.execute("ALTER TABLE threads ADD COLUMN message_at REAL")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(messages)")}
+        for column in ("category", "priority", "route_to", "summary"):
+            if column not in columns:
+                # Stores created before per-message triage was kept
+                self.conn.execute(f"ALTER TABLE messages ADD COLUMN {column} TEXT")
+        self._lock = threading.Lock()
+        # One triage at a time per thread, so a reply sees its parent's result.
+        # thread_id -> [lock, holders + waiters]; dropped when the count reaches 0.
+        self._thread_locks = {}
+        self.stats = {"messages": 0, "new_threads": 0, "thread_updates": 0, "repeats": 0, "prefiltered": 0,
+                      "unthreaded": 0, "out_of_order": 0, "full_tokens": 0, "sent_tokens": 0}
+
+    def resolve(self, headers, subject="", sender=""):
+        """
+        Returns:
+            (thread_id or None, own message id or None). The thread is the first
+            known ancestor's thread, else the oldest referenced id, else the
+            message itself. Without any ids it is the normalised subject plus the
+            sender's address, and None when the subject is generic or there is
+            no sender: subject alone would merge unrelated mail.
+        """
+        own, ancestors = thread_refs(headers) if headers is not None else ("", [])
+        with self._lock:
+            for ref in ancestors:
+                row = self.conn.execute("SELECT thread_id FROM messages WHERE message_id = ?", (ref,)).fetchone()
+                if row:
+                    return row[0], own or None
+        if ancestors:
+            return ancestors[0], own or None
+        if own:
+            return own, own
+        normalised, address = thread_subject(subject), sender_address(sender)
+        if normalised in GENERIC_SUBJECTS or not address:
+            return None, None
+        return f"subject:{normalised}\0from:{address}", None
+
+    @contextmanager
+    def thread_lock(self, thread_id):
+        with self._lock:
+            entry = self._thread_locks.get(thread_id)
+            if entry is None:
+                entry = self._thread_locks[thread_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._thread_locks[thread_id]
+
+    def known_message(self, message_id):
+        """Triage stored for this exact message if it was already triaged, else None."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT category, priority, route_to, summary FROM messages WHERE message_id = ?",
+                (message_id,)).fetchone()
+        # Rows from before per-message triage was stored have no fields: triage again
+        return dict(zip(("category", "priority", "route_to", "summary"), row)) if row and row[0] else None
+
+    def get(self, thread_id):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT category, priority, route_to, summary FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        return dict(zip(("category", "priority", "route_to", "summary"), row)) if row else None
+
+    def save(self, thread_id, message_id, triage, message_at=None):
+        """
+        Store the message's triage as the thread state unless the thread already
+        reflects a newer message (by Date). Messages without a Date apply in
+        arrival order. Returns False when the state was kept as is.
+        """
+        with self._lock, self.conn:
+            if message_id:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO messages (message_id, thread_id, category, priority, route_to, summary) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (message_id, thread_id, triage["category"], triage["priority"], triage["route_to"],
+                     triage["summary"]))
+            row = self.conn.execute("SELECT message_at FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+            if row and row[0] is not None and message_at is not None and message_at < row[0]:
+                self.stats["out_of_order"] += 1
+                return False
+            self.conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, category, priority, route_to, summary, updated_at, "
+                "message_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, triage["category"], triage["priority"], triage["route_to"], triage["summary"],
+                 time.time(), message_at if message_at is not None else (row[0] if row else None)))
+            return True
+
+    def record(self, outcome, full_tokens, sent_tokens):
+        with self._lock:
+            self.stats["messages"] += 1
+            self.stats[outcome] += 1
+            self.stats["full_tokens"] += full_tokens
+            self.stats["sent_tokens"] += sent_tokens
+
+    def metrics(self):
+        with self._lock:
+            full, sent = self.stats["full_tokens"], self.stats["sent_tokens"]
+            return {**self.stats, "tokens_saved": full - sent,
+                    "token_savings_rate": (full - sent) / full if full else 0.0}
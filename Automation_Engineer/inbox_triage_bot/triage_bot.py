@@ -1,13 +1,27 @@
 import os
 import json
-from openai import OpenAI
+import time
+import threading
 from pydantic import BaseModel
 from typing import List
 from dotenv import load_dotenv
+from llm_gateway import metrics as gateway_metrics, openai_client
+
+from coalesce import SingleFlight
+from prefilter import PreFilter
+from threads import ThreadStore, count_tokens, message_time, pasted_sender, pasted_subject, strip_quoted
 
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "your-key-here"))
+# Pooled, rate-limited and retried by the shared gateway; safe to use from worker threads
+client = openai_client("inbox-triage")
+
+llm_flights = SingleFlight()
+prefilter = PreFilter()
+
+def normalise(email_body):
+    """Case and whitespace-insensitive coalescing key."""
+    return " ".join(email_body.lower().split())
 
 class EmailTriage(BaseModel):
     category: str
@@ -15,8 +29,7 @@ class EmailTriage(BaseModel):
     route_to: str
     summary: str
 
-def triage_email(email_body):
-    system_prompt = """
+SYSTEM_PROMPT = """
     You are an Ops Inbox Triage Bot.
     Classify the email into: [Sales, Support, Partnerships, Spam].
     Assign priority: [Low, Medium, High].
@@ -24,8 +37,25 @@ def triage_email(email_body):
     Provide a 1-sentence summary.
     Return JSON.
     """
-    
+
+THREAD_UPDATE_PROMPT = """
+    This email is a new reply in a thread that was already triaged as:
+    Category: {category}. Priority: {priority}. Route to: {route_to}.
+    Thread summary so far: {summary}
+    Only the new reply is included. Update the triage for the whole thread; keep the summary to 1 sentence.
+    """
+
+def triage_email(email_body, headers=None):
+    # Auto-replies, bulk mail, obvious spam and known domains never reach the LLM
+    decision, _ = prefilter.match(email_body, headers)
+    if decision is not None:
+        return EmailTriage(**decision)
+    return _triage_llm(email_body)
+
+def _triage_llm(email_body, prior=None):
     if not os.getenv("OPENAI_API_KEY"):
+        if prior is not None:
+            return EmailTriage(**prior)
         return EmailTriage(
             category="Sales",
             priority="High",
@@ -33,6 +63,71 @@ def triage_email(email_body):
             summary="Potential lead inquiring about enterprise pricing."
         )
 
+    system_prompt = SYSTEM_PROMPT
+    key = normalise(email_body)
+    if prior is not None:
+        system_prompt += THREAD_UPDATE_PROMPT.format(**prior)
+        key = normalise(prior["summary"]) + "\n" + key
+    start = time.perf_counter()
+    result = llm_flights.do(key, lambda: _call_llm(system_prompt, email_body))
+    prefilter.record_llm(time.perf_counter() - start)
+    return result
+
+_thread_store = None
+_thread_store_lock = threading.Lock()
+
+def get_thread_store():
+    global _thread_store
+    with _thread_store_lock:
+        if _thread_store is None:
+            _thread_store = ThreadStore()
+        return _thread_store
+
+def triage_thread(email_body, headers=None, store=None):
+    """
+    Thread-aware triage. Quoted history is stripped and the thread's stored
+    triage + summary is sent as context, so the LLM only sees the new reply.
+    Re-sent messages (known Message-ID) are answered from the store. A reply
+    older (by Date) than the one the thread state reflects is triaged but
+    does not overwrite that state. Mail that can't be tied to a thread is
+    triaged on its own and not stored.
+    """
+    store = store or get_thread_store()
+    if headers is not None:
+        subject, sender = headers.get("Subject", ""), headers.get("From", "")
+    else:
+        subject, sender = pasted_subject(email_body), pasted_sender(email_body)
+    thread_id, message_id = store.resolve(headers, subject, sender)
+    full_tokens = count_tokens(email_body)
+
+    if message_id:
+        known = store.known_message(message_id)
+        if known is not None:
+            store.record("repeats", full_tokens, 0)
+            return EmailTriage(**known)
+
+    delta = strip_quoted(email_body)
+    decision, _ = prefilter.match(delta, headers)
+    if decision is not None:
+        # e.g. an out-of-office reply: don't let it overwrite the thread's triage
+        store.record("prefiltered", full_tokens, 0)
+        return EmailTriage(**decision)
+
+    if thread_id is None:
+        result = _triage_llm(delta, None)
+        store.record("unthreaded", full_tokens, count_tokens(delta))
+        return result
+
+    with store.thread_lock(thread_id):
+        prior = store.get(thread_id)
+        result = _triage_llm(delta, prior)
+        store.save(thread_id, message_id, result.model_dump(),
+                   message_time(headers) if headers is not None else None)
+    sent_tokens = count_tokens(delta) + (count_tokens(THREAD_UPDATE_PROMPT.format(**prior)) if prior else 0)
+    store.record("thread_updates" if prior else "new_threads", full_tokens, sent_tokens)
+    return result
+
+def _call_llm(system_prompt, email_body):
     response = client.chat.completions.create(
         model="gpt-3.5-turbo",
         messages=[
@@ -0,0 +1,28 @@
+"""
+Shared LLM gateway: one HTTP/2 keep-alive pool, a global token-bucket rate
+limiter, an adaptive (AIMD) concurrency limit, a response cache and per-caller
+latency/token metrics for every app in the repo that talks to an
+OpenAI-compatible API.
+
+    from llm_gateway import openai_client
+    client = openai_client("inbox-triage")
+"""
+from .cache import ResponseCache
+from .clients import async_http_client, async_openai_client, get_gateway, http_client, metrics, openai_client
+from .limits import AdaptiveConcurrencyLimiter, TokenBucket
+from .transport import Gateway, GatewayAsyncTransport, GatewayTransport
+
+__all__ = [
+    "AdaptiveConcurrencyLimiter",
+    "Gateway",
+    "GatewayAsyncTransport",
+    "GatewayTransport",
+    "ResponseCache",
+    "TokenBucket",
+    "async_http_client",
+    "async_openai_client",
+    "get_gateway",
+    "http_client",
+    "metrics",
+    "openai_client",
+]
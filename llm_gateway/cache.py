@@ -0,0 +1,69 @@
+"""
+In-process response cache for deterministic upstream calls.
+Keyed by sha256(method, full URL incl. host and port, credentials, request body),
+so different upstreams or API keys never share entries. Only successful, non-streaming
+responses are stored, with a TTL and LRU eviction bounded by both entry count
+and total body bytes; a single response larger than the byte budget is not stored.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Headers that select the account/credentials a response belongs to
+_CREDENTIAL_HEADERS = ("authorization", "api-key", "openai-organization", "openai-project")
+
+class ResponseCache:
+
+    def __init__(self, max_entries=2048, ttl_s=3600, max_bytes=64 << 20):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request):
+        h = hashlib.sha256()
+        for part in (request.method, str(request.url), *(request.headers.get(name, "") for name in _CREDENTIAL_HEADERS)):
+            h.update(part.encode() + b"\0")
+        h.update(request.content)
+        return h.hexdigest()
+
+    def get(self, key):
+        """(status, headers, content) or None."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def _drop(self, key):
+        # Caller holds the lock
+        _, (_, _, content) = self._data.pop(key)
+        self.bytes -= len(content)
+
+    def set(self, key, status, headers, content):
+        if self.max_entries <= 0 or len(content) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic() + self.ttl_s, (status, headers, content))
+            self.bytes += len(content)
+            while len(self._data) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def metrics(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"entries": len(self._data), "bytes": self.bytes, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / total if total else 0.0}
@@ -0,0 +1,78 @@
+"""
+Client factories. Every app asks for a client tagged with its caller name; all
+of them share one process-wide Gateway configured from the environment:
+
+  LLM_GATEWAY_RPS              global request rate (requests/s, 0 = unlimited)   [50]
+  LLM_GATEWAY_BURST            token-bucket burst size                           [= RPS]
+  LLM_GATEWAY_CONCURRENCY      initial adaptive in-flight limit                  [16]
+  LLM_GATEWAY_MAX_CONCURRENCY  ceiling for the adaptive limit                    [128]
+  LLM_GATEWAY_TIMEOUT_S        per-request timeout                               [60]
+  LLM_GATEWAY_MAX_RETRIES      retries on 429/5xx/timeouts                       [3]
+  LLM_GATEWAY_CACHE_SIZE       response cache entries (0 disables)               [2048]
+  LLM_GATEWAY_CACHE_TTL_S      response cache TTL                                [3600]
+  LLM_GATEWAY_CACHE_MAX_MB     response cache size budget                        [64]
+  LLM_GATEWAY_HTTP2            "0" to force HTTP/1.1                              [1]
+
+The upstream URL is the SDK's usual OPENAI_BASE_URL, so pointing that at
+`python -m llm_gateway.mock_server` runs everything locally.
+"""
+import os
+import threading
+import httpx
+
+from .transport import Gateway, GatewayAsyncTransport, GatewayTransport
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            rate = float(os.getenv("LLM_GATEWAY_RPS", "50"))
+            _gateway = Gateway(
+                rate_per_s=rate,
+                burst=float(os.getenv("LLM_GATEWAY_BURST", "0")) or None,
+                initial_concurrency=int(os.getenv("LLM_GATEWAY_CONCURRENCY", "16")),
+                max_concurrency=int(os.getenv("LLM_GATEWAY_MAX_CONCURRENCY", "128")),
+                timeout_s=float(os.getenv("LLM_GATEWAY_TIMEOUT_S", "60")),
+                max_retries=int(os.getenv("LLM_GATEWAY_MAX_RETRIES", "3")),
+                cache_entries=int(os.getenv("LLM_GATEWAY_CACHE_SIZE", "2048")),
+                cache_ttl_s=float(os.getenv("LLM_GATEWAY_CACHE_TTL_S", "3600")),
+                cache_max_bytes=int(float(os.getenv("LLM_GATEWAY_CACHE_MAX_MB", "64")) * (1 << 20)),
+                http2=os.getenv("LLM_GATEWAY_HTTP2", "1") == "1",
+            )
+        return _gateway
+
+def http_client(caller, max_retries=None, cache_all=False):
+    """
+    Args:
+        caller: name used for per-caller metrics
+        max_retries: override the gateway retry count (0 for callers with their own retry policy)
+        cache_all: cache every non-streaming response (including embeddings), not just temperature=0 chat calls
+    """
+    gateway = get_gateway()
+    return httpx.Client(transport=GatewayTransport(gateway, caller, max_retries, cache_all), timeout=gateway.timeout)
+
+def async_http_client(caller, max_retries=None, cache_all=False):
+    gateway = get_gateway()
+    return httpx.AsyncClient(transport=GatewayAsyncTransport(gateway, caller, max_retries, cache_all),
+                             timeout=gateway.timeout)
+
+def openai_client(caller, **kwargs):
+    """Sync OpenAI client whose traffic goes through the gateway (SDK retries off; the gateway retries)."""
+    from openai import OpenAI
+    kwargs.setdefault("api_key", os.getenv("OPENAI_API_KEY", "your-key-here"))
+    return OpenAI(http_client=http_client(caller, kwargs.pop("gateway_retries", None), kwargs.pop("cache_all", False)),
+                  max_retries=0, **kwargs)
+
+def async_openai_client(caller, **kwargs):
+    from openai import AsyncOpenAI
+    kwargs.setdefault("api_key", os.getenv("OPENAI_API_KEY", "your-key-here"))
+    return AsyncOpenAI(http_client=async_http_client(caller, kwargs.pop("gateway_retries", None),
+                                                     kwargs.pop("cache_all", False)),
+                       max_retries=0, **kwargs)
+
+def metrics():
+    """Per-caller latency/token/error counts plus limiter, rate-limit and cache state."""
+    return get_gateway().snapshot()
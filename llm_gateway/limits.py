@@ -0,0 +1,138 @@
+"""
+Process-wide admission control shared by sync (thread) and async callers.
+
+TokenBucket: global request-rate limit with bursts.
+AdaptiveConcurrencyLimiter: AIMD in-flight limit that grows while upstream is
+healthy and backs off multiplicatively on 429s, 5xx and timeouts.
+"""
+import time
+import asyncio
+import threading
+from collections import deque
+
+class TokenBucket:
+    """`rate` requests/second with bursts up to `burst`; rate <= 0 disables limiting."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_s = 0.0
+
+    def _reserve(self):
+        """Take a token (possibly going into debt); returns how long the caller must wait."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.waited_s += wait
+            return wait
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+    def metrics(self):
+        return {"rate_per_s": self.rate, "burst": self.burst, "waited_s": round(self.waited_s, 3)}
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Additive-increase / multiplicative-decrease limit on in-flight requests.
+    Slots are handed directly to the oldest waiter (thread or asyncio task, on
+    any event loop) on release, so waiters are served FIFO.
+    """
+
+    def __init__(self, initial=16, min_limit=1, max_limit=256, backoff=0.7):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.decreases = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self):
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+        return False
+
+    def acquire(self):
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            future = loop.create_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                elif future.done() and not future.cancelled():
+                    # The slot was handed over just before we were cancelled
+                    self._release_slot()
+                # else: _hand_over sees the cancelled future and returns the slot
+            raise
+
+    def release(self, overloaded=False):
+        """Return a slot and adapt the limit to how the request went."""
+        with self._lock:
+            if overloaded:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._release_slot()
+
+    def _release_slot(self):
+        # Caller holds the lock
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                try:
+                    waiter.get_loop().call_soon_threadsafe(self._hand_over, waiter)
+                except RuntimeError:
+                    # Waiter's event loop is already closed
+                    self.in_flight -= 1
+
+    def _hand_over(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._release_slot()
+        else:
+            future.set_result(None)
+
+    def metrics(self):
+        with self._lock:
+            return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "waiting": len(self._waiters),
+                    "peak_in_flight": self.peak_in_flight, "decreases": self.decreases}
@@ -0,0 +1,66 @@
+"""
+Mixed-traffic smoke/load test: simulates the four apps calling through the
+gateway at once and prints per-caller metrics and limiter state.
+
+1. python -m llm_gateway.mock_server      (MOCK_MAX_CONCURRENCY=24 to see AIMD back off)
+2. OPENAI_BASE_URL=http://127.0.0.1:8200/v1 OPENAI_API_KEY=mock python -m llm_gateway.loadgen
+   (add LLM_GATEWAY_RPS=0 so the concurrency limit, not the rate limit, is what binds)
+"""
+import json
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from . import async_openai_client, metrics, openai_client
+
+async def ticket_traffic(n):
+    client = async_openai_client("ticket-classifier")
+    await asyncio.gather(*(client.chat.completions.create(
+        model="gpt-3.5-turbo", response_format={"type": "json_object"},
+        messages=[{"role": "user", "content": f"Ticket {i}: I can't log in"}]) for i in range(n)))
+
+async def content_traffic(n):
+    client = async_openai_client("content-ops")
+
+    async def one(i):
+        stream = await client.chat.completions.create(
+            model="gpt-3.5-turbo", stream=True, stream_options={"include_usage": True},
+            messages=[{"role": "user", "content": f"Write a Bold Email post #{i}"}])
+        async for _ in stream:
+            pass
+    await asyncio.gather(*(one(i) for i in range(n)))
+
+async def kb_traffic(n):
+    client = async_openai_client("kb-qa")
+    await asyncio.gather(*(client.embeddings.create(model="text-embedding-ada-002", input=[f"chunk {i}"])
+                           for i in range(n // 2)))
+    # temperature=0 questions run twice: the second pass is served from the response cache
+    for _ in range(2):
+        await asyncio.gather(*(client.chat.completions.create(
+            model="gpt-3.5-turbo", temperature=0, messages=[{"role": "user", "content": f"Question {i}"}])
+            for i in range(n // 2)))
+
+def triage_traffic(n, threads=16):
+    client = openai_client("inbox-triage")
+
+    def one(i):
+        client.chat.completions.create(model="gpt-3.5-turbo", response_format={"type": "json_object"},
+                                       messages=[{"role": "user", "content": f"Email {i}"}])
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(one, range(n)))
+
+async def main(n):
+    start = time.perf_counter()
+    triage = asyncio.get_running_loop().run_in_executor(None, triage_traffic, n)
+    await asyncio.gather(ticket_traffic(n), content_traffic(n), kb_traffic(n), triage)
+    stats = metrics()
+    calls = sum(caller["requests"] for caller in stats["callers"].values())
+    print(f"⏱️ {calls} logical calls in {time.perf_counter() - start:.2f}s")
+    print(json.dumps(stats, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive mixed multi-app traffic through the LLM gateway.")
+    parser.add_argument("--requests", type=int, default=100, help="calls per simulated app")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
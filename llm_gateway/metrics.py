@@ -0,0 +1,52 @@
+"""
+Per-caller request metrics: counts, errors, cache hits, retries, token usage
+and latency percentiles over a bounded window of recent upstream requests
+(cache hits are counted but record no latency).
+"""
+import threading
+from collections import deque, defaultdict
+
+class CallerMetrics:
+
+    def __init__(self, window=2048):
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = deque(maxlen=window)
+
+    def snapshot(self):
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 1) if ordered else None
+
+        return {"requests": self.requests, "errors": self.errors, "cache_hits": self.cache_hits,
+                "retries": self.retries, "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99)}
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._callers = defaultdict(CallerMetrics)
+        self._lock = threading.Lock()
+
+    def record(self, caller, latency_s=None, error=False, cache_hit=False, retries=0, usage=None):
+        with self._lock:
+            m = self._callers[caller]
+            m.requests += 1
+            m.errors += int(error)
+            m.cache_hits += int(cache_hit)
+            m.retries += retries
+            if latency_s is not None:
+                m.latencies.append(latency_s)
+            if usage:
+                m.prompt_tokens += usage.get("prompt_tokens") or 0
+                m.completion_tokens += usage.get("completion_tokens") or 0
+
+    def snapshot(self):
+        with self._lock:
+            return {caller: m.snapshot() for caller, m in self._callers.items()}
@@ -0,0 +1,153 @@
+"""
+Local OpenAI-compatible stand-in for running every app (and the gateway) offline.
+Supports /v1/chat/completions (JSON mode, plain text and SSE streaming) and
+/v1/embeddings. Latency and upstream capacity are configurable so rate limiting,
+retries and the adaptive concurrency limit can be exercised:
+
+  MOCK_LATENCY_S         per-request latency                      [0.2]
+  MOCK_MAX_CONCURRENCY   in-flight requests before answering 429  [0 = unlimited]
+  MOCK_ERROR_RATE        fraction of random 503s                  [0]
+  MOCK_RATE_LIMIT_RATE   fraction of random 429s (Retry-After)    [0]
+
+It is the single mock for the repo: the ticket classifier load test and the KB
+embedding benchmark run against it too.
+
+Run: python -m llm_gateway.mock_server   (from the repo root; MOCK_PORT, default 8200)
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LATENCY_S = float(os.getenv("MOCK_LATENCY_S", "0.2"))
+MAX_CONCURRENCY = int(os.getenv("MOCK_MAX_CONCURRENCY", "0"))
+ERROR_RATE = float(os.getenv("MOCK_ERROR_RATE", "0"))
+RATE_LIMIT_RATE = float(os.getenv("MOCK_RATE_LIMIT_RATE", "0"))
+
+app = FastAPI(title="Mock OpenAI-compatible API")
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "rejected_429": 0, "errors_503": 0}
+
+# Superset of the JSON shapes the apps ask for; unknown keys are ignored by their schemas
+MOCK_JSON = {
+    "tags": ["account", "technical"],
+    "priority": "High",
+    "suggested_action": "Send a password reset link and verify the account email.",
+    "category": "Support",
+    "route_to": "Zendesk",
+    "summary": "Customer cannot log in and needs a password reset.",
+}
+
+def _tokens(text):
+    return max(1, len(text) // 4)
+
+def _prompt_text(messages):
+    return "\n".join(m.get("content") or "" for m in messages if isinstance(m.get("content"), str))
+
+async def _admit():
+    """None when admitted, else an error response (capacity or injected failure)."""
+    stats["requests"] += 1
+    if (MAX_CONCURRENCY and stats["in_flight"] >= MAX_CONCURRENCY) or (RATE_LIMIT_RATE and random.random() < RATE_LIMIT_RATE):
+        stats["rejected_429"] += 1
+        return JSONResponse({"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            status_code=429, headers={"retry-after": "0.2"})
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        stats["errors_503"] += 1
+        return JSONResponse({"error": {"message": "Service unavailable", "type": "server_error"}}, status_code=503)
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    return None
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    rejected = await _admit()
+    if rejected is not None:
+        return rejected
+
+    messages = body.get("messages", [])
+    model = body.get("model", "gpt-3.5-turbo")
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        content = json.dumps(MOCK_JSON)
+    else:
+        last = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "") or ""
+        content = f"Mock reply to: {last[:200]}"
+    usage = {"prompt_tokens": _tokens(_prompt_text(messages)), "completion_tokens": _tokens(content)}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    created = int(time.time())
+
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            try:
+                words = content.split(" ")
+                for i, word in enumerate(words):
+                    await asyncio.sleep(LATENCY_S / len(words))
+                    chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created,
+                             "model": model, "choices": [{"index": 0, "finish_reason": None,
+                                                          "delta": {"content": word + (" " if i < len(words) - 1 else "")}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                done = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(done)}\n\n"
+                if include_usage:
+                    yield f"data: {json.dumps({**done, 'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    try:
+        await asyncio.sleep(LATENCY_S)
+    finally:
+        stats["in_flight"] -= 1
+    return {
+        "id": f"chatcmpl-mock-{stats['requests']}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+def _embedding(text, dim):
+    """Deterministic unit vector derived from the text hash."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    rejected = await _admit()
+    if rejected is not None:
+        return rejected
+    inputs = body.get("input", [])
+    inputs = [inputs] if isinstance(inputs, str) else inputs
+    dim = int(body.get("dimensions") or 1536)
+    try:
+        await asyncio.sleep(LATENCY_S)
+    finally:
+        stats["in_flight"] -= 1
+    prompt_tokens = sum(_tokens(str(text)) for text in inputs)
+    return {
+        "object": "list",
+        "model": body.get("model", "text-embedding-ada-002"),
+        "data": [{"object": "embedding", "index": i, "embedding": _embedding(str(text), dim)}
+                 for i, text in enumerate(inputs)],
+        "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+    }
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("MOCK_PORT", "8200")), log_level="warning")
@@ -0,0 +1,35 @@
+"""Response cache eligibility and size bounds."""
+import httpx
+
+from llm_gateway import ResponseCache
+
+from .test_slots import BODY, OK, URL, gateway, sync_client
+
+def test_response_cache_skips_embeddings_and_respects_byte_budget():
+    gw = gateway(lambda request: httpx.Response(200, content=OK))
+    with sync_client(gw) as client:
+        for _ in range(2):
+            client.post("http://upstream.test/v1/embeddings", json={"model": "e", "input": ["a"]})
+            client.post(URL, json={**BODY, "temperature": 0})
+    assert gw.cache.metrics()["entries"] == 1 and gw.cache.hits == 1
+
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("big", 200, [], b"x" * 101)
+    for i in range(3):
+        cache.set(str(i), 200, [], b"x" * 40)
+    assert cache.get("big") is None and cache.get("0") is None
+    assert cache.metrics()["entries"] == 2 and cache.bytes == 80
+
+def test_cache_key_separates_upstreams_and_credentials_and_hits_skip_latency():
+    gw = gateway(lambda request: httpx.Response(200, content=OK))
+    request = {**BODY, "temperature": 0}
+    with sync_client(gw) as client:
+        for _ in range(2):
+            client.post(URL, json=request, headers={"authorization": "Bearer a"})
+        client.post(URL, json=request, headers={"authorization": "Bearer b"})
+        client.post("http://other.test:8080/v1/chat/completions", json=request, headers={"authorization": "Bearer a"})
+    assert gw.cache.hits == 1 and gw.cache.metrics()["entries"] == 3
+    stats = gw.snapshot()["callers"]["test"]
+    assert stats["requests"] == 4 and stats["cache_hits"] == 1
+    # Only the three upstream calls are in the latency window
+    assert len(gw.metrics._callers["test"].latencies) == 3
@@ -0,0 +1,50 @@
+"""Per-event-loop connection pools are reused within a loop and closed when asyncio.run() ends."""
+import gc
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+
+from llm_gateway import Gateway, GatewayAsyncTransport
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = b'{"data": [], "usage": {"prompt_tokens": 1}}'
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1/embeddings"
+    server.shutdown()
+
+def test_pool_reused_within_loop_and_closed_with_it(server_url):
+    gw = Gateway(rate_per_s=0, http2=False)
+    pools = []
+
+    async def run():
+        async with httpx.AsyncClient(transport=GatewayAsyncTransport(gw, "test")) as client:
+            for _ in range(3):
+                await client.post(server_url, json={"input": ["a"]})
+        pool = await gw.async_pool()
+        pools.append(pool)
+        # Three sequential requests share one keep-alive connection
+        assert len(pool._pool.connections) == 1
+
+    for _ in range(2):
+        asyncio.run(run())
+        assert len(pools[-1]._pool.connections) == 0
+    gc.collect()
+    assert len(gw._async_pools) == 0
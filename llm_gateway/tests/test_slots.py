@@ -0,0 +1,151 @@
+"""
+Concurrency-slot accounting: every way a request can end (success, mid-body
+read error, cancellation, a stream failing or being dropped) must give its
+slot back, or the process eventually deadlocks on the limiter.
+
+Run from the repo root: python -m pytest llm_gateway/tests
+"""
+import gc
+import json
+import asyncio
+import httpx
+import pytest
+
+from llm_gateway import AdaptiveConcurrencyLimiter, Gateway, GatewayAsyncTransport, GatewayTransport
+
+URL = "http://upstream.test/v1/chat/completions"
+BODY = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+OK = b'{"choices": [], "usage": {"prompt_tokens": 1, "completion_tokens": 2}}'
+
+class BrokenBody(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Sends one chunk and then drops the connection."""
+
+    def __iter__(self):
+        yield b'{"choices": '
+        raise httpx.ReadError("connection reset mid-body")
+
+    async def __aiter__(self):
+        yield b'{"choices": '
+        raise httpx.ReadError("connection reset mid-body")
+
+class SlowBody(httpx.AsyncByteStream):
+
+    async def __aiter__(self):
+        yield b"data: {}\n\n"
+        await asyncio.sleep(60)
+        yield b"data: [DONE]\n\n"
+
+def gateway(handler, **kwargs):
+    kwargs.setdefault("initial_concurrency", 2)
+    kwargs.setdefault("max_retries", 0)
+    return Gateway(rate_per_s=0, upstream=httpx.MockTransport(handler), **kwargs)
+
+def sequence(*responses):
+    """Handler returning the given responses in order (the last one repeats)."""
+    queue = list(responses)
+
+    def handler(request):
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+    return handler
+
+def sync_client(gw, **kwargs):
+    return httpx.Client(transport=GatewayTransport(gw, "test", **kwargs))
+
+def async_client(gw, **kwargs):
+    return httpx.AsyncClient(transport=GatewayAsyncTransport(gw, "test", **kwargs))
+
+def test_read_error_mid_body_releases_slot():
+    gw = gateway(sequence(httpx.Response(200, stream=BrokenBody()), httpx.Response(200, stream=BrokenBody()),
+                          httpx.Response(200, content=OK)))
+    with sync_client(gw) as client:
+        for _ in range(2):
+            with pytest.raises(httpx.ReadError):
+                client.post(URL, json=BODY)
+        assert gw.limiter.in_flight == 0
+        # With leaked slots this would block forever (limit is 2)
+        assert client.post(URL, json=BODY).status_code == 200
+    callers = gw.snapshot()["callers"]["test"]
+    assert callers["errors"] == 2 and callers["requests"] == 3
+
+def test_read_error_mid_body_is_retried():
+    gw = gateway(sequence(httpx.Response(200, stream=BrokenBody()), httpx.Response(200, content=OK)))
+    with sync_client(gw, max_retries=1) as client:
+        assert client.post(URL, json=BODY).json()["usage"]["completion_tokens"] == 2
+    stats = gw.snapshot()
+    assert stats["concurrency"]["in_flight"] == 0
+    assert stats["callers"]["test"]["retries"] == 1
+
+def test_async_read_error_and_cancellation_release_slots():
+    async def slow(request):
+        await asyncio.sleep(60)
+        return httpx.Response(200, content=OK)
+
+    async def run():
+        broken = gateway(sequence(httpx.Response(200, stream=BrokenBody())))
+        async with async_client(broken) as client:
+            for _ in range(3):
+                with pytest.raises(httpx.ReadError):
+                    await client.post(URL, json=BODY)
+        assert broken.limiter.in_flight == 0
+
+        hanging = gateway(slow)
+        async with async_client(hanging) as client:
+            for _ in range(3):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(client.post(URL, json=BODY), 0.05)
+        assert hanging.limiter.in_flight == 0
+
+    asyncio.run(run())
+
+def test_streams_release_on_failure_exhaustion_and_abandonment():
+    async def run():
+        gw = gateway(sequence(httpx.Response(200, stream=BrokenBody()), httpx.Response(200, stream=SlowBody()),
+                              httpx.Response(200, content=b"data: {}\n\ndata: [DONE]\n\n")))
+        request = {**BODY, "stream": True}
+        async with async_client(gw) as client:
+            # Upstream drops the stream midway
+            async with client.stream("POST", URL, json=request) as response:
+                with pytest.raises(httpx.ReadError):
+                    async for _ in response.aiter_raw():
+                        pass
+            assert gw.limiter.in_flight == 0
+
+            # Consumer gives up on a stream without closing it
+            response = await client.send(client.build_request("POST", URL, json=request), stream=True)
+            assert gw.limiter.in_flight == 1
+            del response
+            gc.collect()
+            assert gw.limiter.in_flight == 0
+
+            # Normal exhaustion
+            response = await client.post(URL, json=request)
+            assert response.status_code == 200
+            assert gw.limiter.in_flight == 0
+
+    asyncio.run(run())
+
+def test_limiter_cancelled_waiter_does_not_leak():
+    async def run():
+        limiter = AdaptiveConcurrencyLimiter(initial=1, max_limit=1)
+        await limiter.acquire_async()
+        waiter = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0)
+        # Slot is handed to the waiter and the waiter is cancelled in the same tick
+        limiter.release()
+        waiter.cancel()
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 0 and limiter.metrics()["waiting"] == 0
+        await asyncio.wait_for(limiter.acquire_async(), 1)
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+
+def test_retry_status_then_success_keeps_one_record():
+    gw = gateway(sequence(httpx.Response(503, headers={"retry-after": "0"}, content=b"{}"),
+                          httpx.Response(200, content=OK)))
+    with sync_client(gw, max_retries=1) as client:
+        assert client.post(URL, content=json.dumps(BODY)).status_code == 200
+    stats = gw.snapshot()
+    assert stats["concurrency"]["in_flight"] == 0 and stats["concurrency"]["decreases"] == 1
+    assert stats["callers"]["test"]["requests"] == 1 and stats["callers"]["test"]["retries"] == 1
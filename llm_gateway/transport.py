@@ -0,0 +1,386 @@
+"""
+httpx transports that route every upstream LLM request through the gateway:
+token bucket -> adaptive concurrency slot -> (response cache) -> pooled
+HTTP/2 keep-alive connection, with retry on 429/5xx/timeouts and per-caller
+metrics. Plugging them in at the transport layer means the OpenAI SDK, LangChain
+and raw httpx clients all share the same policy without code changes.
+"""
+import json
+import time
+import random
+import asyncio
+import weakref
+import threading
+import httpx
+
+from .cache import ResponseCache
+from .limits import AdaptiveConcurrencyLimiter, TokenBucket
+from .metrics import MetricsRegistry
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {429, 503}
+# Failures anywhere in the exchange, including while reading the body
+TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+def _has_h2():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class Gateway:
+    """Shared state: connection pools, rate limiter, concurrency limiter, cache, metrics."""
+
+    def __init__(self, rate_per_s=50.0, burst=None, initial_concurrency=16, max_concurrency=128,
+                 timeout_s=60.0, max_retries=3, cache_entries=2048, cache_ttl_s=3600, cache_max_bytes=64 << 20,
+                 max_connections=100, http2=True, upstream=None):
+        self.bucket = TokenBucket(rate_per_s, burst)
+        self.limiter = AdaptiveConcurrencyLimiter(initial_concurrency, max_limit=max_concurrency)
+        self.cache = ResponseCache(cache_entries, cache_ttl_s, cache_max_bytes)
+        self.metrics = MetricsRegistry()
+        self.timeout = httpx.Timeout(timeout_s, connect=5.0)
+        self.max_retries = max_retries
+        # HTTP/2 needs the `h2` package; fall back to HTTP/1.1 keep-alive without it
+        self.http2 = http2 and _has_h2()
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections,
+                                   keepalive_expiry=60)
+        # A transport used in place of the pooled connections (tests, in-process fakes)
+        self.upstream = upstream
+        self._sync_pool = None
+        # httpcore async pools are bound to one event loop: {loop: (pool, closer)}
+        self._async_pools = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def sync_pool(self):
+        if self.upstream is not None:
+            return self.upstream
+        with self._lock:
+            if self._sync_pool is None:
+                self._sync_pool = httpx.HTTPTransport(http2=self.http2, limits=self.limits, retries=1)
+            return self._sync_pool
+
+    async def async_pool(self):
+        if self.upstream is not None:
+            return self.upstream
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_pools.get(loop)
+            if entry is not None:
+                return entry[0]
+            pool = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits, retries=1)
+            closer = _close_on_loop_shutdown(pool, lambda: self._forget_pool(loop))
+            self._async_pools[loop] = (pool, closer)
+        # Registers the closer with the loop's async-generator hooks (see _close_on_loop_shutdown)
+        await closer.__anext__()
+        return pool
+
+    def _forget_pool(self, loop):
+        # The closer references the loop, so its entry must go once it has run
+        with self._lock:
+            self._async_pools.pop(loop, None)
+
+    def snapshot(self):
+        return {"callers": self.metrics.snapshot(), "concurrency": self.limiter.metrics(),
+                "rate_limit": self.bucket.metrics(), "cache": self.cache.metrics(), "http2": self.http2}
+
+async def _close_on_loop_shutdown(pool, on_closed):
+    """
+    Parked async generator that owns a loop's pool. asyncio.run() (and Runner.close)
+    finalizes every live async generator before closing the loop, which runs the
+    finally clause while the loop can still close the pool's sockets cleanly.
+    Long-lived loops (uvicorn, a dedicated I/O thread) keep their pool for good.
+    """
+    try:
+        yield
+    finally:
+        try:
+            await pool.aclose()
+        finally:
+            on_closed()
+
+def _request_json(request):
+    # Embedding requests are never streamed and always cacheable; skip parsing their (large) input lists
+    if request.url.path.endswith("/embeddings"):
+        return {}
+    try:
+        return json.loads(request.content or b"{}")
+    except ValueError:
+        return {}
+
+def _cacheable(request, body, cache_all):
+    # Embeddings are large and already cached durably by their callers (the KB's SQLite
+    # embedding cache), so they are only held here when a caller opts in with cache_all
+    if request.method != "POST" or body.get("stream"):
+        return False
+    return cache_all or (body.get("temperature") == 0 and not request.url.path.endswith("/embeddings"))
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 30.0)
+        except ValueError:
+            pass
+    return 0.5 * (2 ** attempt) * (0.5 + random.random())
+
+def _decoded(status, headers, raw):
+    """Decode content-encoding once here so the returned response carries plain bytes."""
+    content = httpx.Response(status, headers=headers, content=raw).content
+    headers = [(k, v) for k, v in headers.items() if k.lower() not in ("content-encoding", "content-length")]
+    return headers, content
+
+_decoder = json.JSONDecoder()
+
+def _usage(content):
+    """The `usage` object, decoded on its own so large bodies (embeddings) aren't parsed twice."""
+    at = content.rfind(b'"usage"')
+    if at < 0:
+        return None
+    start = content.find(b"{", at)
+    if start < 0:
+        return None
+    try:
+        usage, _ = _decoder.raw_decode(content[start:].decode("utf-8"))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return usage if isinstance(usage, dict) else None
+
+class _UsageScanner:
+    """Picks the `usage` object out of a streamed SSE body (sent when stream_options.include_usage is set)."""
+
+    def __init__(self):
+        self.usage = None
+        self._tail = b""
+
+    def feed(self, chunk):
+        lines = (self._tail + chunk).split(b"\n")
+        self._tail = lines.pop()
+        for line in lines:
+            if line.startswith(b"data: {") and b'"usage"' in line:
+                usage = _usage(line[6:])
+                if usage:
+                    self.usage = usage
+
+class _MeteredStream(httpx.SyncByteStream):
+    """
+    Releases the call's slot when the body is exhausted, fails or is closed;
+    a stream dropped without any of those is released when it is collected.
+    """
+
+    def __init__(self, stream, call):
+        self._stream = stream
+        self._call = call
+        self._scanner = _UsageScanner()
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                self._scanner.feed(chunk)
+                yield chunk
+        except GeneratorExit:
+            # Consumer stopped early; not an upstream failure
+            self._call.finish(usage=self._scanner.usage)
+            raise
+        except BaseException as e:
+            self._call.finish(overloaded=isinstance(e, TRANSIENT_ERRORS), error=True)
+            raise
+        self._call.finish(usage=self._scanner.usage)
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._call.finish(usage=self._scanner.usage)
+
+    def __del__(self):
+        self._call.finish(usage=self._scanner.usage)
+
+class _AsyncMeteredStream(httpx.AsyncByteStream):
+
+    def __init__(self, stream, call):
+        self._stream = stream
+        self._call = call
+        self._scanner = _UsageScanner()
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                self._scanner.feed(chunk)
+                yield chunk
+        except GeneratorExit:
+            self._call.finish(usage=self._scanner.usage)
+            raise
+        except BaseException as e:
+            self._call.finish(overloaded=isinstance(e, TRANSIENT_ERRORS), error=True)
+            raise
+        self._call.finish(usage=self._scanner.usage)
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._call.finish(usage=self._scanner.usage)
+
+    def __del__(self):
+        # Limiter.release is thread- and loop-safe, so this is fine from the GC
+        self._call.finish(usage=self._scanner.usage)
+
+class _Call:
+    """Bookkeeping for one logical request: a concurrency slot per attempt, one metrics record overall."""
+
+    def __init__(self, gateway, caller):
+        self.gateway = gateway
+        self.caller = caller
+        self.start = time.perf_counter()
+        self.retries = 0
+        self.holding_slot = False
+        self.recorded = False
+        # finish() can race between a stream's consumer and the garbage collector
+        self._lock = threading.Lock()
+
+    def acquired(self):
+        self.holding_slot = True
+
+    def release(self, overloaded=False):
+        with self._lock:
+            holding, self.holding_slot = self.holding_slot, False
+        if holding:
+            self.gateway.limiter.release(overloaded)
+
+    def retry(self):
+        """Give the slot back as overloaded before the next attempt."""
+        self.release(overloaded=True)
+        self.retries += 1
+
+    def finish(self, overloaded=False, error=False, usage=None):
+        self.release(overloaded)
+        with self._lock:
+            recorded, self.recorded = self.recorded, True
+        if not recorded:
+            self.gateway.metrics.record(self.caller, time.perf_counter() - self.start, error=error,
+                                        retries=self.retries, usage=usage)
+
+def _buffered_response(call, key, response, raw, request):
+    """Finish the call for a fully read body, cache it when eligible and return a plain response."""
+    status = response.status_code
+    headers, content = _decoded(status, response.headers, raw)
+    failed = status >= 400
+    call.finish(overloaded=status in OVERLOAD_STATUSES, error=failed, usage=None if failed else _usage(content))
+    if key is not None and not failed:
+        call.gateway.cache.set(key, status, headers, content)
+    return httpx.Response(status, headers=headers, content=content, request=request)
+
+class GatewayTransport(httpx.BaseTransport):
+    """Sync transport; all instances share the gateway's keep-alive pool."""
+
+    def __init__(self, gateway, caller, max_retries=None, cache_all=False):
+        self.gateway = gateway
+        self.caller = caller
+        self.max_retries = gateway.max_retries if max_retries is None else max_retries
+        self.cache_all = cache_all
+
+    def handle_request(self, request):
+        gw = self.gateway
+        body = _request_json(request)
+        key = None
+        if _cacheable(request, body, self.cache_all):
+            key = ResponseCache.key(request)
+            hit = gw.cache.get(key)
+            if hit is not None:
+                # Counted as a hit but kept out of the latency window, which describes upstream calls
+                gw.metrics.record(self.caller, cache_hit=True)
+                return httpx.Response(hit[0], headers=hit[1], content=hit[2], request=request)
+
+        call = _Call(gw, self.caller)
+        try:
+            for attempt in range(self.max_retries + 1):
+                gw.bucket.acquire()
+                gw.limiter.acquire()
+                call.acquired()
+                try:
+                    response = gw.sync_pool().handle_request(request)
+                    if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                        response.close()
+                        call.retry()
+                        time.sleep(_retry_delay(response, attempt))
+                        continue
+                    if body.get("stream") and response.status_code < 400:
+                        return httpx.Response(response.status_code, headers=response.headers, request=request,
+                                              stream=_MeteredStream(response.stream, call))
+                    try:
+                        raw = b"".join(response.stream)
+                    finally:
+                        response.close()
+                except TRANSIENT_ERRORS:
+                    # Connect, read (including mid-body) and protocol failures are all retried
+                    if attempt == self.max_retries:
+                        raise
+                    call.retry()
+                    time.sleep(_retry_delay(None, attempt))
+                    continue
+                return _buffered_response(call, key, response, raw, request)
+        except BaseException as e:
+            call.finish(overloaded=isinstance(e, TRANSIENT_ERRORS), error=True)
+            raise
+
+    def close(self):
+        # The pool is shared process-wide; individual clients don't own it
+        pass
+
+class GatewayAsyncTransport(httpx.AsyncBaseTransport):
+    """Async transport; shares one keep-alive pool per event loop."""
+
+    def __init__(self, gateway, caller, max_retries=None, cache_all=False):
+        self.gateway = gateway
+        self.caller = caller
+        self.max_retries = gateway.max_retries if max_retries is None else max_retries
+        self.cache_all = cache_all
+
+    async def handle_async_request(self, request):
+        gw = self.gateway
+        body = _request_json(request)
+        key = None
+        if _cacheable(request, body, self.cache_all):
+            key = ResponseCache.key(request)
+            hit = gw.cache.get(key)
+            if hit is not None:
+                # Counted as a hit but kept out of the latency window, which describes upstream calls
+                gw.metrics.record(self.caller, cache_hit=True)
+                return httpx.Response(hit[0], headers=hit[1], content=hit[2], request=request)
+
+        call = _Call(gw, self.caller)
+        try:
+            for attempt in range(self.max_retries + 1):
+                await gw.bucket.acquire_async()
+                await gw.limiter.acquire_async()
+                call.acquired()
+                try:
+                    pool = await gw.async_pool()
+                    response = await pool.handle_async_request(request)
+                    if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                        await response.aclose()
+                        call.retry()
+                        await asyncio.sleep(_retry_delay(response, attempt))
+                        continue
+                    if body.get("stream") and response.status_code < 400:
+                        return httpx.Response(response.status_code, headers=response.headers, request=request,
+                                              stream=_AsyncMeteredStream(response.stream, call))
+                    try:
+                        raw = b"".join([chunk async for chunk in response.stream])
+                    finally:
+                        await response.aclose()
+                except TRANSIENT_ERRORS:
+                    if attempt == self.max_retries:
+                        raise
+                    call.retry()
+                    await asyncio.sleep(_retry_delay(None, attempt))
+                    continue
+                return _buffered_response(call, key, response, raw, request)
+        except BaseException as e:
+            # Includes cancellation (e.g. a caller's wait_for timeout): the slot always goes back
+            call.finish(overloaded=isinstance(e, TRANSIENT_ERRORS), error=True)
+            raise
+
+    async def aclose(self):
+        pass